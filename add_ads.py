@@ -1,10 +1,7 @@
 import sys
 import os
-
-# 强制刷新输出，确保你能看到打印内容
-sys.stdout.reconfigure(encoding='utf-8')
-
-print("Script is starting... (脚本启动中)", flush=True)
+import re
+from concurrent.futures import ProcessPoolExecutor
 
 # ================= 配置区 =================
 
@@ -13,56 +10,125 @@ print("Script is starting... (脚本启动中)", flush=True)
 # False = 实战模式 (真正修改)
 DRY_RUN = False 
 
-# 🎯 目标文件夹
+# 🎯 目标文件夹 (会递归进入子目录，build_site.DREAMS_LAYOUT 分子目录时同样适用)
 # 确保这个路径相对于脚本是存在的
-TARGET_FOLDER = 'public/dreams'
+OUTPUT_DIR = 'public'
+TARGET_FOLDERS = [f'{OUTPUT_DIR}/dreams', f'{OUTPUT_DIR}/en/dreams']
+# 📄 目录之外单独处理的页面 (首页同样带 AD_CODE，和 build_css.list_pages 一致)
+TARGET_FILES = [f'{OUTPUT_DIR}/index.html']
+
+# ⏱️ 广告加载方式 (build_site.py 生成新页面时也读这个开关)
+# 'eager'    = 在 <head> 里直接加载 adsbygoogle.js (和页面自己的脚本、字体抢带宽)
+# 'deferred' = 用一小段内联脚本，在用户首次交互或浏览器空闲时再加载
+# 改完后运行本脚本，会把所有已存在的页面一次性切换到新方式
+AD_LOAD_MODE = 'deferred'
+
+AD_CLIENT = "ca-pub-9279583389810634"
+AD_SCRIPT_URL = f"https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client={AD_CLIENT}"
 
 # 你的 Google AdSense 代码
-AD_CODE = """<script async src="https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client=ca-pub-9279583389810634"
+AD_CODE = f"""<script async src="{AD_SCRIPT_URL}"
      crossorigin="anonymous"></script>"""
 
+# 延迟加载版本 (首次交互或空闲时再插入 adsbygoogle.js，页面上的广告位会在脚本加载后自动填充)
+DEFERRED_AD_CODE = f"""<!-- adsense:deferred -->
+<script>
+(function () {{
+    var loaded = false;
+    function loadAds() {{
+        if (loaded) return;
+        loaded = true;
+        var s = document.createElement('script');
+        s.async = true;
+        s.crossOrigin = 'anonymous';
+        s.src = '{AD_SCRIPT_URL}';
+        document.head.appendChild(s);
+    }}
+    ['pointerdown', 'keydown', 'scroll', 'touchstart'].forEach(function (evt) {{
+        window.addEventListener(evt, loadAds, {{ once: true, passive: true }});
+    }});
+    window.addEventListener('load', function () {{
+        if ('requestIdleCallback' in window) requestIdleCallback(loadAds, {{ timeout: 3000 }});
+        else setTimeout(loadAds, 2000);
+    }});
+}})();
+</script>
+<!-- /adsense:deferred -->"""
+
+# 用来识别页面里已有的两种广告代码 (包括历史上重复插入的)
+EAGER_AD_PATTERN = re.compile(
+    r'[ \t]*<script async src="https://pagead2\.googlesyndication\.com/pagead/js/adsbygoogle\.js\?client=ca-pub-\d+"\s*'
+    r'crossorigin="anonymous"></script>\r?\n?'
+)
+DEFERRED_AD_PATTERN = re.compile(r'<!-- adsense:deferred -->.*?<!-- /adsense:deferred -->\r?\n?', re.S)
+
 # 扫描后缀
 TARGET_EXTENSIONS = ['.html', '.htm']
 
+# 并行进程数
+WORKERS = os.cpu_count() or 4
+
 # ==========================================
 
+def ad_code(mode=AD_LOAD_MODE):
+    """ 返回指定加载方式的广告代码 """
+    return DEFERRED_AD_CODE if mode == 'deferred' else AD_CODE
+
+def apply_ad_mode(content, mode=AD_LOAD_MODE):
+    """ 移除页面里已有的广告代码 (不论哪种方式)，再在 </head> 前插入指定方式的一份 """
+    if "</head>" not in content:
+        return content
+    if ad_code(mode) in content and content.count(AD_CLIENT) == ad_code(mode).count(AD_CLIENT):
+        return content
+    stripped = DEFERRED_AD_PATTERN.sub('', EAGER_AD_PATTERN.sub('', content))
+    return stripped.replace("</head>", f"{ad_code(mode)}\n</head>", 1)
+
 def insert_ad_code(filepath):
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
 
-        # 1. 检查是否已有广告
-        if "ca-pub-9279583389810634" in content:
+        # 1. 寻找 </head> 标签
+        if "</head>" not in content:
+            print(f"[跳过] 没找到head标签: {filepath}", flush=True)
             return False
 
-        # 2. 寻找 </head> 标签
-        if "</head>" in content:
-            if DRY_RUN:
-                print(f"[预演] 发现目标: {filepath}", flush=True)
-                return True
-            else:
-                new_content = content.replace("</head>", f"{AD_CODE}\n</head>")
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                print(f"[成功] 已添加广告: {filepath}", flush=True)
-                return True
-        else:
-            print(f"[跳过] 没找到head标签: {filepath}", flush=True)
+        # 2. 检查广告是否已经是目标加载方式
+        new_content = apply_ad_mode(content, AD_LOAD_MODE)
+        if new_content == content:
             return False
 
+        if DRY_RUN:
+            print(f"[预演] 发现目标: {filepath}", flush=True)
+            return True
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        print(f"[成功] 已切换广告代码: {filepath}", flush=True)
+        return True
+
     except Exception as e:
         print(f"[错误] 读写失败 {filepath}: {e}", flush=True)
         return False
 
+def process_batch(paths):
+    """ 子进程入口：处理一批文件，返回修改数量 """
+    return sum(1 for path in paths if insert_ad_code(path))
+
 def main():
+    # 强制刷新输出，确保你能看到打印内容
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    print("Script is starting... (脚本启动中)", flush=True)
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    base_dir = os.path.join(script_dir, TARGET_FOLDER)
+    base_dirs = [os.path.join(script_dir, folder) for folder in TARGET_FOLDERS]
 
-    print(f"正在寻找文件夹: {base_dir}", flush=True)
+    print(f"正在寻找文件夹: {', '.join(base_dirs)}", flush=True)
 
-    if not os.path.exists(base_dir):
+    base_dirs = [base_dir for base_dir in base_dirs if os.path.exists(base_dir)]
+    if not base_dirs:
         print(f"\n❌ 错误：找不到文件夹！", flush=True)
-        print(f"请检查路径是否正确: {base_dir}", flush=True)
+        print(f"请检查路径是否正确: {TARGET_FOLDERS}", flush=True)
         return
 
     
@@ -74,22 +140,28 @@ def main():
         print("\n--- ⚡ 实战模式 (正在修改文件) ---", flush=True)
         print("正在处理...", flush=True)
 
+    print(f"广告加载方式: {AD_LOAD_MODE}", flush=True)
+
+    filepaths = [path for path in (os.path.join(script_dir, file) for file in TARGET_FILES) if os.path.exists(path)]
+    for base_dir in base_dirs:
+        for root, dirs, files in os.walk(base_dir):
+            for file in files:
+                if any(file.endswith(ext) for ext in TARGET_EXTENSIONS):
+                    filepaths.append(os.path.join(root, file))
+    scanned_count = len(filepaths)
+
+    # 1.4 万个文件分批交给进程池并行处理
+    batches = [filepaths[i:i + 500] for i in range(0, len(filepaths), 500)]
     updated_count = 0
-    scanned_count = 0
-
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if any(file.endswith(ext) for ext in TARGET_EXTENSIONS):
-                filepath = os.path.join(root, file)
-                scanned_count += 1
-                if insert_ad_code(filepath):
-                    updated_count += 1
-    
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        for count in pool.map(process_batch, batches):
+            updated_count += count
+
     print("-" * 30, flush=True)
     if DRY_RUN:
         print(f"预演结束。如果开启实战模式，将有 {updated_count} 个文件被修改。", flush=True)
     else:
-        print(f"大功告成！一共修改了 {updated_count} 个文件。", flush=True)
+        print(f"大功告成！扫描 {scanned_count} 个文件，一共修改了 {updated_count} 个文件。", flush=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
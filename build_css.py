@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import hashlib
+import shutil
+import posixpath
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+# ================= 配置区 =================
+
+# 用构建期生成的静态 CSS 替换浏览器里的 Tailwind JIT 编译器 (cdn.tailwindcss.com)。
+# 流程：收集模板和已生成页面里用到的 class -> 调用 Tailwind CLI 一次性编译 ->
+#       输出带哈希的 CSS 文件 (可永久缓存) -> 把所有页面的 CDN 脚本替换成 <link>。
+
+TEMPLATE_FILE = 'symbol_template.html'
+OUTPUT_DIR = 'public'
+DREAMS_DIR = os.path.join(OUTPUT_DIR, 'dreams')
+EN_DREAMS_DIR = os.path.join(OUTPUT_DIR, 'en', 'dreams')
+PAGE_DIRS = [DREAMS_DIR, EN_DREAMS_DIR]   # 与 add_ads.TARGET_FOLDERS 一致
+ASSETS_DIR = os.path.join(OUTPUT_DIR, 'assets')
+CSS_MANIFEST = os.path.join(ASSETS_DIR, 'css-manifest.json')
+HEADERS_FILE = os.path.join(OUTPUT_DIR, '_headers')
+
+# 编译用的临时文件 (不会被部署)
+BUILD_DIR = '.build'
+CONTENT_FILE = os.path.join(BUILD_DIR, 'tailwind-content.html')
+INPUT_CSS = os.path.join(BUILD_DIR, 'tailwind-input.css')
+RAW_OUTPUT_CSS = os.path.join(BUILD_DIR, 'tailwind-output.css')
+
+# Tailwind CLI (需要 Node.js)，v3 与 CDN 版本的默认主题一致
+TAILWIND_CMD = ['npx', '--yes', 'tailwindcss@3']
+
+# 除了当前版本，再保留几个旧版本的 CSS 文件：CDN 上还缓存着的旧 HTML 引用的是旧哈希
+KEEP_PREVIOUS = 1
+
+# 同时匹配 CDN 脚本和上一次构建写入的 <link>，这样重复运行可以直接换成新哈希
+STYLESHEET_PATTERN = re.compile(
+    r'<script src="https://cdn\.tailwindcss\.com"></script>'
+    r'|<link rel="stylesheet" href="/assets/tailwind\.[0-9a-f]+\.css">'
+)
+CLASS_PATTERN = re.compile(r'class="([^"]*)"')
+
+WORKERS = os.cpu_count() or 4
+
+# ==========================================
+
+def load_stylesheet_href():
+    """ 读取上一次编译的 CSS 地址，没有编译过则返回 None (页面继续使用 CDN) """
+    if not os.path.exists(CSS_MANIFEST):
+        return None
+    with open(CSS_MANIFEST, 'r', encoding='utf-8') as f:
+        return json.load(f).get('tailwind')
+
+def apply_stylesheet(html, href):
+    """ 把 Tailwind CDN 脚本 (或旧的 <link>) 换成静态样式表 """
+    if not href:
+        return html
+    return STYLESHEET_PATTERN.sub(f'<link rel="stylesheet" href="{href}">', html)
+
+def list_pages():
+    """ 需要处理的所有页面：索引页 + 中英文 dreams 目录 """
+    pages = []
+    index_path = os.path.join(OUTPUT_DIR, 'index.html')
+    if os.path.exists(index_path):
+        pages.append(index_path)
+    for folder in PAGE_DIRS:
+        for root, dirs, files in os.walk(folder):
+            for file in files:
+                if file.endswith('.html'):
+                    pages.append(os.path.join(root, file))
+    return pages
+
+def collect_classes(paths):
+    """ 收集一批文件里出现的全部 class """
+    classes = set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for value in CLASS_PATTERN.findall(f.read()):
+                classes.update(value.split())
+    return classes
+
+def collect_all_classes(paths):
+    """ 并行收集一批页面 + 模板里的全部 class """
+    classes = collect_classes([TEMPLATE_FILE]) if os.path.exists(TEMPLATE_FILE) else set()
+    if not paths:
+        return classes
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        for batch_classes in pool.map(collect_classes, chunked(paths, 500)):
+            classes |= batch_classes
+    return classes
+
+def tailwind_available():
+    return shutil.which(TAILWIND_CMD[0]) is not None
+
+def rewrite_pages(args):
+    """ 把一批页面改为引用静态样式表，返回修改的文件数 """
+    paths, href = args
+    changed = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content = apply_stylesheet(content, href)
+        if new_content != content:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            changed += 1
+    return changed
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def compile_css(classes):
+    """ 调用 Tailwind CLI 编译，返回 CSS 文本；失败返回 None """
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    # 只把去重后的 class 交给 Tailwind 扫描，而不是让它扫 1.4 万个页面
+    with open(CONTENT_FILE, 'w', encoding='utf-8') as f:
+        f.write(f'<div class="{" ".join(sorted(classes))}"></div>\n')
+    with open(INPUT_CSS, 'w', encoding='utf-8') as f:
+        f.write('@tailwind base;\n@tailwind components;\n@tailwind utilities;\n')
+
+    cmd = TAILWIND_CMD + ['-i', INPUT_CSS, '-o', RAW_OUTPUT_CSS, '--content', CONTENT_FILE, '--minify']
+    if not tailwind_available():
+        print(f"❌ 找不到 {cmd[0]}，请先安装 Node.js")
+        return None
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ Tailwind 编译失败:\n{result.stderr}")
+        return None
+    with open(RAW_OUTPUT_CSS, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def write_hashed_css(css):
+    """ 写入带内容哈希的 CSS 文件并更新清单，返回公开地址 """
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    digest = hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+    filename = f'tailwind.{digest}.css'
+    href = f'/assets/{filename}'
+
+    # 上一个版本 (以及更早的 KEEP_PREVIOUS 个) 先留着，其余清理掉
+    previous = []
+    if os.path.exists(CSS_MANIFEST):
+        with open(CSS_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for old_href in [manifest.get('tailwind')] + manifest.get('previous', []):
+            if old_href and old_href != href and old_href not in previous:
+                previous.append(old_href)
+    previous = previous[:KEEP_PREVIOUS]
+    keep = {filename} | {posixpath.basename(old_href) for old_href in previous}
+    for old in os.listdir(ASSETS_DIR):
+        if old.startswith('tailwind.') and old.endswith('.css') and old not in keep:
+            os.remove(os.path.join(ASSETS_DIR, old))
+
+    with open(os.path.join(ASSETS_DIR, filename), 'w', encoding='utf-8') as f:
+        f.write(css)
+    with open(CSS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump({'tailwind': href, 'previous': previous}, f, ensure_ascii=False, indent=2)
+    return href
+
+def build_stylesheet(classes):
+    """ 编译并写入样式表，返回公开地址；编译失败返回 None """
+    css = compile_css(classes)
+    if css is None:
+        return None
+    href = write_hashed_css(css)
+    ensure_cache_headers()
+    print(f"✅ 样式表已生成: {href} ({len(css) // 1024} KB)")
+    return href
+
+def ensure_cache_headers():
+    """ 带哈希的资源内容永不变化，可以让 CDN 和浏览器缓存一年 """
+    rule = "/assets/*\n  Cache-Control: public, max-age=31536000, immutable\n"
+    existing = ""
+    if os.path.exists(HEADERS_FILE):
+        with open(HEADERS_FILE, 'r', encoding='utf-8') as f:
+            existing = f.read()
+    if "/assets/*" not in existing:
+        with open(HEADERS_FILE, 'a', encoding='utf-8') as f:
+            f.write(("\n" if existing and not existing.endswith("\n") else "") + rule)
+
+def main():
+    print("=== 静态 CSS 构建 ===")
+
+    pages = list_pages()
+    print(f"📄 扫描 {len(pages)} 个页面 + 模板...")
+
+    batches = chunked(pages, 500)
+    classes = collect_all_classes(pages)
+    print(f"🎨 共发现 {len(classes)} 个不同的 class")
+
+    href = build_stylesheet(classes)
+    if href is None:
+        print("⚠️ 未修改任何页面，页面仍使用 Tailwind CDN")
+        return
+
+    changed = 0
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        for count in pool.map(rewrite_pages, [(batch, href) for batch in batches]):
+            changed += count
+    print(f"🎉 已更新 {changed} 个页面的样式引用")
+
+if __name__ == "__main__":
+    main()
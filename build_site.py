@@ -2,8 +2,13 @@ import json
 import os
 import datetime
 import shutil
-import random
 import re
+import hashlib
+
+from add_ads import AD_LOAD_MODE, ad_code, apply_ad_mode
+from build_css import apply_stylesheet, load_stylesheet_href
+from entries import load_entries
+from related import compute_related, entry_key
 
 # ================= 配置区 =================
 
@@ -16,11 +21,32 @@ DATA_FILE = 'symbols_updated.json'     # 数据源
 TEMPLATE_FILE = 'symbol_template.html' # 模板文件
 OUTPUT_DIR = 'public'
 DREAMS_DIR = os.path.join(OUTPUT_DIR, 'dreams')
+EN_DREAMS_DIR = os.path.join(OUTPUT_DIR, 'en', 'dreams')
+# 每个语言版本的输出目录 (中文在 /dreams/，英文预渲染在 /en/dreams/)
+LANG_DIRS = {'zh': DREAMS_DIR, 'en': EN_DREAMS_DIR}
 DOMAIN = "https://dreamwhisperai.com" 
 
-# 💰 Google AdSense 广告代码
-AD_CODE = """<script async src="https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client=ca-pub-9279583389810634"
-     crossorigin="anonymous"></script>"""
+# 🗂️ 词条页在磁盘上的目录布局 (对外的网址始终是 /dreams/<文件名>，不受影响)
+# 'flat'   = 全部放在 dreams/ 下 (默认)
+# 'hash'   = 按文件名的 md5 前 SHARD_WIDTH 位分子目录，如 dreams/3f/Cats.html
+# 'prefix' = 按文件名第一个字符分子目录，如 dreams/c/Cats.html、dreams/猫/猫咪.html
+# 非 flat 时会在 functions/ 下生成 Pages Function，请求时算出子目录再取页面 (原网址不变，也没有规则条数上限)。
+# 改了布局直接重新构建即可：已有页面会被挪到新位置，不需要重新生成。
+DREAMS_LAYOUT = 'flat'
+SHARD_WIDTH = 2
+FUNCTIONS_DIR = 'functions'
+REWRITE_MARKER = 'build_site.py 自动生成，请勿手改'
+
+# 🔗 相关梦境开关 (在每个页面底部加上 TF-IDF 计算出的相关词条链接，数量见 related.RELATED_TOP_K)
+RELATED_ENABLED = True
+
+# 🎲 SEO 文案洗牌盐值
+# 文案变体由词条 id + 盐值哈希决定，同样的数据每次构建出的页面字节完全一致 (利于 CDN 缓存和增量部署)。
+# 想有意重新洗牌时，把它改成任意新字符串 (例如日期 "2025-12")，洗牌后的结果同样稳定。
+SEO_SHUFFLE_SALT = ""
+
+# 💰 Google AdSense 广告代码 (加载方式由 add_ads.AD_LOAD_MODE 统一控制)
+AD_CODE = ad_code(AD_LOAD_MODE)
 
 # ================= SEO 文案库 =================
 SEO_TITLES_ZH = [
@@ -41,6 +67,102 @@ INTRO_TEMPLATES_ZH = [
     "当你醒来记得自己梦见了<strong>{name}</strong>，说明你的潜意识正在试图告诉你一些重要信息。"
 ]
 
+SEO_TITLES_EN = [
+    "Dreaming of {name}: Meaning and Symbolism Explained",
+    "What Does It Mean to Dream About {name}?",
+    "{name} Dream Meaning: Psychology and Tradition",
+    "Dream About {name}? Here Is What Your Subconscious Is Saying"
+]
+
+INTRO_TEMPLATES_EN = [
+    "Dreams are the language of the subconscious. What does dreaming of <strong>{name}</strong> really mean?",
+    "Did you dream of <strong>{name}</strong> last night? It may not be a coincidence.",
+    "Jung believed that <strong>{name}</strong> in a dream reflects a hidden longing."
+]
+
+# 模板中可直接预渲染的字段 (对应 {{ZH_*}} 占位符和 data-i18n 属性)
+PAGE_FIELDS = ['name', 'subname', 'summary', 'psych_1', 'psych_2', 'trad_good', 'trad_bad']
+
+# 英文版静态 UI 文案 (与模板里的 uiTranslations.en 一致)
+UI_TEXT_EN = {
+    "back_dict": "Back Home",
+    "title_psych": "Psychological Perspective",
+    "title_trad": "Traditional Interpretation",
+    "trad_good_label": "Good:",
+    "trad_bad_label": "Bad:"
+}
+
+def page_url(lang, filename):
+    """ 某个语言版本页面的站内路径 """
+    return f"/dreams/{filename}" if lang == 'zh' else f"/{lang}/dreams/{filename}"
+
+def has_page(item, lang):
+    """ 词条是否生成该语言的页面 (英文记录只是爬虫占位文案时不单独出页面) """
+    record = item.record(lang)
+    if record is None or not record.name:
+        # 空记录 ({}) 写回时保留，但没有内容可渲染
+        return False
+    return lang == 'zh' or not record.is_placeholder()
+
+def shard_of(filename):
+    """ 文件名所在的子目录 ('flat' 布局返回空字符串) """
+    if DREAMS_LAYOUT == 'hash':
+        return hashlib.md5(filename.encode('utf-8')).hexdigest()[:SHARD_WIDTH]
+    if DREAMS_LAYOUT == 'prefix':
+        first = filename[:1].lower()
+        return first if first.isalnum() else '_'
+    return ''
+
+def page_path(lang, filename):
+    """ 某个语言版本页面在磁盘上的路径 """
+    return os.path.join(LANG_DIRS[lang], shard_of(filename), filename)
+
+def list_page_files(lang):
+    """ 扫描某个语言目录 (含子目录)，返回 {文件名: 磁盘路径} """
+    found = {}
+    stack = [LANG_DIRS[lang]]
+    while stack:
+        directory = stack.pop()
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.html'):
+                    found[entry.name] = entry.path
+    return found
+
+def relocate_pages(listing=None):
+    """ 把已有页面挪到当前布局对应的位置 (切换布局时用，移动文件而不是重新渲染)，返回 {语言: {文件名: 路径}}
+    listing 为调用方已经扫描好的 {语言: {文件名: 路径}}，不传则自己扫描 """
+    pages = {}
+    moved = 0
+    for lang, directory in LANG_DIRS.items():
+        pages[lang] = dict(listing[lang]) if listing is not None else list_page_files(lang)
+        emptied = set()
+        for filename, path in pages[lang].items():
+            target = page_path(lang, filename)
+            if os.path.normpath(path) != os.path.normpath(target):
+                ensure_dir(os.path.dirname(target))
+                os.replace(path, target)
+                pages[lang][filename] = target
+                emptied.add(os.path.dirname(path))
+                moved += 1
+        # 清掉搬空的子目录 (只看有文件搬出去的目录，不再遍历整个语言目录)
+        for folder in sorted(emptied, key=len, reverse=True):
+            while os.path.normpath(folder) != os.path.normpath(directory) and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+                folder = os.path.dirname(folder)
+    if moved:
+        print(f"🗂️ 已按 {DREAMS_LAYOUT} 布局移动 {moved} 个页面")
+    return pages
+
+def pick_variant(variants, key, kind):
+    """ 按 key 稳定地选出一个文案变体，盐值不变时结果永远相同 """
+    digest = hashlib.md5(f"{SEO_SHUFFLE_SALT}|{kind}|{key}".encode('utf-8')).digest()
+    return variants[int.from_bytes(digest[:4], 'big') % len(variants)]
+
 def load_template():
     if not os.path.exists(TEMPLATE_FILE):
         print(f"❌ 错误：找不到模板文件 {TEMPLATE_FILE}")
@@ -52,55 +174,121 @@ def ensure_dir(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def generate_page(item, template, existing_files):
-    filename = item.get('filename')
-    if not filename:
-        return False
-        
-    filepath = os.path.join(DREAMS_DIR, filename)
+def related_link(item):
+    """ 别的页面的相关链接里会用到的信息：文件名 + 各语言页面上显示的名称 (没有该语言页面时为 None) """
+    names = [item.record(lang).name if has_page(item, lang) else None for lang in LANG_DIRS]
+    return [item.filename] + names
 
-    # ⚡ 检查文件是否存在 (增量逻辑)
-    if SKIP_EXISTING and filename in existing_files:
-        return "skipped"
+def render_related(related, lang):
+    """ 页面底部的"相关梦境"链接列表 (同一语言目录下的相对链接) """
+    links = ""
+    for other in related:
+        record = other.record(lang)
+        if has_page(other, lang) and record.name and other.filename:
+            links += f'                <li><a href="{other.filename}" class="block p-3 bg-white/5 hover:bg-white/10 rounded-lg transition">{record.name}</a></li>\n'
+    if not links:
+        return ""
+    title = "相关梦境" if lang == 'zh' else "Related Dreams"
+    return f"""
+        <!-- Related Dreams -->
+        <div class="glass-panel rounded-2xl p-8 mt-8">
+            <h2 class="text-2xl font-serif font-bold mb-4 text-green-300">{title}</h2>
+            <ul class="grid grid-cols-2 md:grid-cols-3 gap-3">
+{links}            </ul>
+        </div>
+"""
 
-    # --- 数据准备 ---
-    zh_data = item.get('zh', {})
-    en_data = item.get('en', {})
-    name_zh = zh_data.get('name', '')
-    
-    # 随机选择 SEO 文案
-    seo_title = random.choice(SEO_TITLES_ZH).format(name=name_zh)
-    seo_intro = random.choice(INTRO_TEMPLATES_ZH).format(name=name_zh)
+def render_page(item, template, lang, related=()):
+    """ 渲染某个语言版本的完整 HTML (不写文件)，related 为相关词条列表 """
+    filename = item.filename
+    record = item.record(lang)
+    name = record.name
+
+    # 按 id 稳定选择 SEO 文案 (同一词条每次构建结果相同)
+    seo_key = item.id or filename
+    titles, intros = (SEO_TITLES_ZH, INTRO_TEMPLATES_ZH) if lang == 'zh' else (SEO_TITLES_EN, INTRO_TEMPLATES_EN)
+    seo_title = pick_variant(titles, seo_key, 'title').format(name=name)
+    seo_intro = pick_variant(intros, seo_key, 'intro').format(name=name)
 
-    # 构建页面数据
+    # 构建页面数据 (每个版本只内嵌自己的语言，切换语言时跳转到另一个静态页面)
+    alternates = {code: page_url(code, filename) for code in LANG_DIRS if has_page(item, code)}
     page_data = {
-        "zh": zh_data,
-        "en": en_data,
+        "lang": lang,
+        lang: record.to_dict(),
+        "alternates": alternates,
         "seo_title": seo_title,
         "seo_intro": seo_intro
     }
     json_data = json.dumps(page_data, ensure_ascii=False)
 
     content = template
-    # 1. 基础替换
-    content = content.replace('{{ZH_NAME}}', name_zh)
-    content = content.replace('{{EN_NAME}}', en_data.get('name', ''))
-    
+    # 1. 基础替换 (模板里的 {{ZH_*}} 占位符就是首屏内容，英文版填英文)
+    content = content.replace('{{EN_NAME}}', item.en.name if item.en else '')
+    if lang == 'zh':
+        content = content.replace('<title>象征字典', f'<title>{seo_title}')
+    else:
+        content = re.sub(r'<title>.*?</title>', lambda m: f'<title>{seo_title}</title>', content, count=1)
+        content = content.replace('<html lang="zh-CN">', '<html lang="en">')
+        content = content.replace('<span id="currentLang">中文</span>', '<span id="currentLang">English</span>')
+        for key, text in UI_TEXT_EN.items():
+            content = re.sub(rf'(data-i18n="{key}">)[^<]*', lambda m: m.group(1) + text, content)
+    for field in PAGE_FIELDS:
+        content = content.replace('{{ZH_' + field.upper() + '}}', getattr(record, field))
+
     # 2. 注入数据到 JS
-    script_inject = f"<script>var pageData = {json_data};</script>"
-    content = content.replace('</body>', f'{script_inject}\n</body>')
-    
-    # 3. SEO Title 替换
-    content = content.replace('<title>象征字典', f'<title>{seo_title}')
+    if '"REPLACE_ME_WITH_JSON"' in content:
+        content = content.replace('"REPLACE_ME_WITH_JSON"', json_data)
+    else:
+        script_inject = f"<script>var pageData = {json_data};</script>"
+        content = content.replace('</body>', f'{script_inject}\n</body>')
 
-    # 🔥 4. 自动植入广告代码
-    if "ca-pub-9279583389810634" not in content:
-        content = content.replace('</head>', f'{AD_CODE}\n</head>')
+    # 3. hreflang：告诉搜索引擎两个语言版本互为替代 (只有一个版本时不写)
+    if len(alternates) > 1:
+        hreflang = "\n".join(
+            f'    <link rel="alternate" hreflang="{code}" href="{DOMAIN}{url}">' for code, url in alternates.items()
+        )
+        hreflang += f'\n    <link rel="alternate" hreflang="x-default" href="{DOMAIN}{alternates.get("zh", page_url(lang, filename))}">'
+        content = content.replace('</head>', f'{hreflang}\n</head>', 1)
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    return "generated"
+    # 4. 相关梦境链接
+    if related:
+        content = content.replace('</main>', f'{render_related(related, lang)}    </main>', 1)
+
+    # 🔥 5. 自动植入广告代码 (模板里自带的广告代码也会换成当前加载方式)
+    content = apply_ad_mode(content, AD_LOAD_MODE)
+
+    return content
+
+def generate_page(item, template, existing_files, related=()):
+    """ 一次生成中英文两个静态页面；existing_files 为 {语言: 已存在文件名集合} """
+    filename = item.filename
+    if not filename:
+        return False
+
+    # 各语言版本互相写了 hreflang，必须成对更新：只要有一个版本需要写 (或删掉了占位页面)，其余版本一起重写
+    langs = []
+    removed = False
+    for lang in LANG_DIRS:
+        if has_page(item, lang):
+            langs.append(lang)
+            continue
+        # 之前生成过的占位页面一并删掉
+        path = page_path(lang, filename)
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+
+    # ⚡ 检查文件是否存在 (增量逻辑)
+    if SKIP_EXISTING and not removed and all(filename in existing_files.get(lang, ()) for lang in langs):
+        return "skipped"
+
+    for lang in langs:
+        content = render_page(item, template, lang, related)
+        path = page_path(lang, filename)
+        ensure_dir(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return "generated" if langs else "skipped"
 
 def generate_index_page(data):
     """ 生成索引页 index.html (已恢复完整逻辑) """
@@ -109,8 +297,8 @@ def generate_index_page(data):
     # 构建列表项 HTML
     list_items = ""
     for item in data:
-        filename = item.get('filename')
-        name_zh = item.get('zh', {}).get('name', '未知')
+        filename = item.filename
+        name_zh = item.zh.name if item.zh else '未知'
         if filename:
             list_items += f'<li><a href="dreams/{filename}" class="block p-3 bg-white/5 hover:bg-white/10 rounded-lg transition">{name_zh}</a></li>\n'
 
@@ -160,6 +348,8 @@ def generate_index_page(data):
 </body>
 </html>"""
     
+    html = apply_stylesheet(html, load_stylesheet_href())
+
     index_path = os.path.join(OUTPUT_DIR, 'index.html')
     with open(index_path, 'w', encoding='utf-8') as f:
         f.write(html)
@@ -181,15 +371,90 @@ def generate_sitemap(data):
     
     # 动态生成的页面
     for item in data:
-        filename = item.get('filename')
+        filename = item.filename
         if filename:
             sitemap_content += f"  <url><loc>{DOMAIN}/dreams/{filename}</loc><lastmod>{today}</lastmod><priority>0.8</priority></url>\n"
+            if has_page(item, 'en'):
+                sitemap_content += f"  <url><loc>{DOMAIN}{page_url('en', filename)}</loc><lastmod>{today}</lastmod><priority>0.7</priority></url>\n"
             
     sitemap_content += '</urlset>'
     
     with open(sitemap_path, 'w', encoding='utf-8') as f:
         f.write(sitemap_content)
 
+# 分子目录布局的改写函数 (与 shard_of 的规则保持一致；Workers 的 crypto.subtle 支持 MD5)
+REWRITE_FUNCTION_JS = """/**
+ * Cloudflare Pages Function (__MARKER__)
+ * 词条页按 DREAMS_LAYOUT 存放在子目录里，对外网址保持 /dreams/<文件名> 不变：
+ * 请求时按 build_site.shard_of 的规则算出子目录，再从静态资源里取页面。
+ */
+
+const LAYOUT = '__LAYOUT__';
+const SHARD_WIDTH = __WIDTH__;
+
+// 文件名所在的子目录 (与 build_site.shard_of 一致)
+async function shardOf(filename) {
+  if (LAYOUT === 'hash') {
+    const digest = await crypto.subtle.digest('MD5', new TextEncoder().encode(filename));
+    const hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    return hex.slice(0, SHARD_WIDTH);
+  }
+  const first = (Array.from(filename)[0] || '').toLowerCase();
+  return /^[\\p{L}\\p{N}]$/u.test(first) ? first : '_';
+}
+
+export async function onRequestGet({ request, env }) {
+  const url = new URL(request.url);
+  const slash = url.pathname.lastIndexOf('/');
+  let filename = decodeURIComponent(url.pathname.slice(slash + 1));
+  // Pages 会把 /dreams/x.html 重定向成 /dreams/x，两种写法都按 x.html 算子目录
+  if (!filename.endsWith('.html')) {
+    filename += '.html';
+  }
+  // 去掉 .html 再取静态资源，避免 Pages 把 .html 308 重定向到子目录的网址上
+  const shard = await shardOf(filename);
+  url.pathname = url.pathname.slice(0, slash + 1) + encodeURIComponent(shard) + '/'
+    + encodeURIComponent(filename.slice(0, -'.html'.length));
+  return env.ASSETS.fetch(new Request(url, request));
+}
+"""
+
+def rewrite_function_path(lang):
+    """ 某个语言版本的改写函数路径，如 functions/dreams/[name].js """
+    return os.path.join(FUNCTIONS_DIR, os.path.relpath(LANG_DIRS[lang], OUTPUT_DIR), '[name].js')
+
+def rewrite_function_source():
+    """ 当前布局对应的改写函数源码 """
+    return (REWRITE_FUNCTION_JS.replace('__MARKER__', REWRITE_MARKER)
+            .replace('__LAYOUT__', DREAMS_LAYOUT).replace('__WIDTH__', str(SHARD_WIDTH)))
+
+def generate_rewrites():
+    """ 非 flat 布局时生成 /dreams/ 和 /en/dreams/ 的改写函数；flat 时删掉之前生成的 (手写的同名文件不动) """
+    source = rewrite_function_source()
+    written = 0
+    for lang in LANG_DIRS:
+        path = rewrite_function_path(lang)
+        if DREAMS_LAYOUT == 'flat':
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    generated = REWRITE_MARKER in f.read()
+                if generated:
+                    os.remove(path)
+                    print(f"🧹 已删除改写函数: {path}")
+                    # 顺手删掉空下来的目录 (不动 functions/ 本身)
+                    folder = os.path.dirname(path)
+                    while os.path.normpath(folder) != os.path.normpath(FUNCTIONS_DIR) and not os.listdir(folder):
+                        os.rmdir(folder)
+                        folder = os.path.dirname(folder)
+            continue
+        ensure_dir(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        written += 1
+    if written:
+        print(f"↪️  改写函数已生成: {FUNCTIONS_DIR}/ 下 {written} 个 (布局 {DREAMS_LAYOUT})")
+    return written
+
 def main():
     print("=== 全自动网站构建系统启动 ===")
     
@@ -200,30 +465,37 @@ def main():
 
     ensure_dir(OUTPUT_DIR)
     ensure_dir(DREAMS_DIR)
+    ensure_dir(EN_DREAMS_DIR)
 
     if not os.path.exists(DATA_FILE):
         print(f"❌ 找不到数据文件 {DATA_FILE}")
         return
         
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_entries(DATA_FILE)
     print(f"📚 加载了 {len(data)} 条数据")
 
     template = load_template()
     if not template:
         return
 
-    # 获取已存在文件
-    existing_files = set()
-    if os.path.exists(DREAMS_DIR):
-        existing_files = set(os.listdir(DREAMS_DIR))
+    # 🎨 如果已经跑过 build_css.py，用静态样式表替换 Tailwind CDN
+    css_href = load_stylesheet_href()
+    template = apply_stylesheet(template, css_href)
+
+    # 获取已存在文件 (每个语言目录各扫一次，顺便把页面挪到当前布局的位置)
+    existing_files = {lang: set(pages) for lang, pages in relocate_pages().items()}
+
+    # 🔗 预计算相关梦境 (只重算内容有变化的词条)
+    related_map = compute_related(data) if RELATED_ENABLED else {}
+    by_key = {entry_key(item): item for item in data}
 
     # 生成页面
     count_new = 0
     count_skip = 0
     
     for item in data:
-        status = generate_page(item, template, existing_files)
+        related = [by_key[key] for key in related_map.get(entry_key(item), [])]
+        status = generate_page(item, template, existing_files, related)
         if status == "generated":
             count_new += 1
             if count_new % 100 == 0:
@@ -240,6 +512,9 @@ def main():
 
     # 生成地图 (每次都跑，确保地图是最新的)
     generate_sitemap(data)
+
+    # 分子目录布局时，让原来的网址继续可用
+    generate_rewrites()
     print("🎉 所有任务全部完成！")
 
 if __name__ == "__main__":
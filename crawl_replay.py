@@ -0,0 +1,342 @@
+import os
+import re
+import io
+import sys
+import json
+import time
+import random
+import hashlib
+import zipfile
+import argparse
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+import scraper
+
+# ================= 配置区 =================
+
+# 🎞️ 离线爬虫回放：不访问真实网站也能测 scraper.py 的吞吐、解析开销和去重效果。
+#     python crawl_replay.py record                  # 真实跑一遍爬虫，把所有响应录进 ARCHIVE_FILE
+#     python crawl_replay.py serve --latency 80      # 只启动本地回放服务
+#     python crawl_replay.py bench --rate-429 0.05 --encoding gbk
+# bench 会在子进程里起回放服务，把爬虫的 requests.get 改写成访问本地服务，
+# 然后完整运行 scraper.main()，统计 页面/秒、每页 CPU 时间 和各提取器的产出率。
+
+ARCHIVE_FILE = os.path.join('.build', 'crawl-fixtures.zip')
+ARCHIVE_VERSION = 1
+
+REPLAY_HOST = '127.0.0.1'
+REPLAY_PORT = 0            # 0 = 随机空闲端口
+RETRY_AFTER = 1            # 注入 429/503 时返回的 Retry-After (秒)
+
+# 统计产出率的函数 (发现关键词 / 提取内容)
+DISCOVERERS = ['crawl_keywords_from_dreaminterpreter', 'crawl_generic_sites']
+EXTRACTORS = ['extract_dreaminterpreter', 'extract_generic_chinese', 'extract_generic_english']
+
+CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.I)
+META_CHARSET = re.compile(rb'(<meta[^>]+charset=["\']?)[\w-]+', re.I)
+
+# ==========================================
+
+@contextlib.contextmanager
+def patched(obj, name, value):
+    """ 临时替换模块/对象上的属性，退出时还原 """
+    original = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield original
+    finally:
+        setattr(obj, name, original)
+
+# --- 录制 ---
+
+def response_encoding(response):
+    """ 录制时确定正文编码：优先响应头里的 charset，没有就按内容猜 """
+    match = CHARSET.search(response.headers.get('Content-Type', ''))
+    return match.group(1).lower() if match else response.apparent_encoding
+
+def save_archive(fixtures, path=ARCHIVE_FILE):
+    """ 写入录制文件：index.json 记录 URL -> 状态/类型/编码，正文按哈希去重存放 """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    index = {}
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        written = set()
+        for url, fixture in fixtures.items():
+            name = 'bodies/' + hashlib.sha1(fixture['body']).hexdigest()
+            if name not in written:
+                archive.writestr(name, fixture['body'])
+                written.add(name)
+            index[url] = {k: v for k, v in fixture.items() if k != 'body'}
+            index[url]['body'] = name
+        archive.writestr('index.json', json.dumps({'version': ARCHIVE_VERSION, 'fixtures': index},
+                                                  ensure_ascii=False, indent=2))
+
+def load_archive(path=ARCHIVE_FILE):
+    with zipfile.ZipFile(path) as archive:
+        index = json.loads(archive.read('index.json'))
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"不支持的录制文件版本: {index.get('version')}")
+        fixtures = {}
+        for url, fixture in index['fixtures'].items():
+            fixtures[url] = dict(fixture, body=archive.read(fixture['body']))
+    return fixtures
+
+def record(path):
+    """ 真实运行一遍爬虫，录下每个响应 (数据写到临时文件，不动真正的词库) """
+    fixtures = {}
+    real_get = requests.get
+
+    def recording_get(url, *args, **kwargs):
+        response = real_get(url, *args, **kwargs)
+        fixtures[url] = {
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'encoding': response_encoding(response),
+            'body': response.content,
+        }
+        return response
+
+    with tempfile.TemporaryDirectory() as tmp, patched(requests, 'get', recording_get), \
+         patched(scraper, 'OUTPUT_FILE', os.path.join(tmp, 'symbols.json')):
+        try:
+            scraper.main()
+        finally:
+            save_archive(fixtures, path)
+            print(f"\n🎞️ 已录制 {len(fixtures)} 个响应 -> {path}")
+
+# --- 回放服务 ---
+
+def transcode(fixture, encoding, strip_charset):
+    """ 按回放选项改写正文编码和 Content-Type，返回 (正文, Content-Type) """
+    body, content_type = fixture['body'], fixture['content_type'] or 'text/html'
+    is_text = content_type.startswith('text/')
+    if is_text and encoding != 'recorded':
+        text = body.decode(fixture['encoding'] or 'utf-8', errors='replace')
+        body = text.encode(encoding, errors='xmlcharrefreplace')
+        body = META_CHARSET.sub(lambda m: m.group(1) + encoding.encode('ascii'), body)
+        content_type = CHARSET.sub(f'charset={encoding}', content_type)
+        if 'charset=' not in content_type:
+            content_type += f'; charset={encoding}'
+    if is_text and strip_charset:
+        # 去掉响应头里的 charset，逼爬虫走自动识别编码的分支
+        content_type = content_type.split(';')[0]
+    return body, content_type
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """ GET /replay?url=<原始地址>：按录制内容回放，可注入延迟和 429/503 """
+
+    def do_GET(self):
+        server = self.server
+        url = parse_qs(urlsplit(self.path).query).get('url', [''])[0]
+
+        with server.lock:
+            delay = max(0.0, server.rng.gauss(server.options['latency'], server.options['jitter'])) / 1000
+            roll = server.rng.random()
+        time.sleep(delay)
+
+        if roll < server.options['rate_429']:
+            return self.send_error_status(429)
+        if roll < server.options['rate_429'] + server.options['rate_503']:
+            return self.send_error_status(503)
+
+        fixture = server.fixtures.get(url)
+        if fixture is None:
+            return self.send_error_status(404, retry=False)
+
+        body, content_type = transcode(fixture, server.options['encoding'], server.options['strip_charset'])
+        self.send_response(fixture['status'])
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_status(self, status, retry=True):
+        body = f"<html><body><h1>{status}</h1></body></html>".encode('utf-8')
+        self.send_response(status)
+        if retry:
+            self.send_header('Retry-After', str(RETRY_AFTER))
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(archive_path, options, port=REPLAY_PORT):
+    server = ThreadingHTTPServer((REPLAY_HOST, port), ReplayHandler)
+    server.daemon_threads = True
+    server.fixtures = load_archive(archive_path)
+    server.options = options
+    server.rng = random.Random(options['seed'])
+    server.lock = threading.Lock()
+    return server
+
+def serve_in_process(archive_path, options, port_queue):
+    """ 子进程入口：回放服务和爬虫不在同一个进程里，CPU 统计只算爬虫自己 """
+    server = make_server(archive_path, options)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+# --- 基准测试 ---
+
+class Counter:
+    """ 包装发现/提取函数，统计调用次数和产出 """
+    def __init__(self):
+        self.stats = {}
+
+    def wrap(self, name, func):
+        stats = self.stats.setdefault(name, {'calls': 0, 'results': 0})
+
+        def wrapper(*args, **kwargs):
+            stats['calls'] += 1
+            result = func(*args, **kwargs)
+            if isinstance(result, list):
+                stats['results'] += len(result)
+            elif result:
+                stats['results'] += 1
+            return result
+        return wrapper
+
+def bench(archive_path, options, existing=None, keep_sleeps=False, verbose=False):
+    ctx = multiprocessing.get_context('spawn')
+    port_queue = ctx.Queue()
+    server = ctx.Process(target=serve_in_process, args=(archive_path, options, port_queue), daemon=True)
+    server.start()
+    base = f"http://{REPLAY_HOST}:{port_queue.get(timeout=30)}/replay"
+
+    real_get = requests.get
+    statuses = {}
+
+    def replay_get(url, *args, **kwargs):
+        kwargs['params'] = {'url': url}
+        response = real_get(base, *args, **kwargs)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return response
+
+    counter = Counter()
+    with contextlib.ExitStack() as stack:
+        tmp = stack.enter_context(tempfile.TemporaryDirectory())
+        output = os.path.join(tmp, 'symbols.json')
+        if existing:
+            # 带着已有词库跑，才能测到去重 (跳过已有词条) 的效果
+            with open(existing, 'rb') as src, open(output, 'wb') as dst:
+                dst.write(src.read())
+        stack.enter_context(patched(requests, 'get', replay_get))
+        stack.enter_context(patched(scraper, 'OUTPUT_FILE', output))
+        # 限速器从零开始，历史产出率也不写进真正的统计文件
+        stack.enter_context(patched(scraper, 'STATS_FILE', os.path.join(tmp, 'crawl-stats.json')))
+        stack.enter_context(patched(scraper, '_throttles', {}))
+        for name in DISCOVERERS + EXTRACTORS:
+            stack.enter_context(patched(scraper, name, counter.wrap(name, getattr(scraper, name))))
+        if not keep_sleeps:
+            # 礼貌等待是给真实网站的，本地回放时不计入
+            stack.enter_context(patched(time, 'sleep', lambda seconds: None))
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        random.seed(options['seed'])
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            scraper.main()
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            server.terminate()
+
+    pages = sum(statuses.values())
+    discovered = sum(counter.stats[name]['results'] for name in DISCOVERERS)
+    attempted = sum(counter.stats[name]['calls'] for name in EXTRACTORS)
+    return {
+        'options': options,
+        'pages': pages,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'wall_seconds': round(wall, 3),
+        'pages_per_second': round(pages / wall, 2) if wall else None,
+        'cpu_ms_per_page': round(cpu * 1000 / pages, 2) if pages else None,
+        'discovered': discovered,
+        'attempted': attempted,
+        'deduplicated': discovered - attempted,
+        'extractors': {
+            name: dict(counter.stats[name], yield_rate=round(counter.stats[name]['results'] / counter.stats[name]['calls'], 3)
+                       if counter.stats[name]['calls'] else None)
+            for name in EXTRACTORS
+        },
+    }
+
+def add_server_options(parser):
+    parser.add_argument('--archive', default=ARCHIVE_FILE, help=f"录制文件 (默认 {ARCHIVE_FILE})")
+    parser.add_argument('--latency', type=float, default=0, help="每个响应的平均延迟 (毫秒)")
+    parser.add_argument('--jitter', type=float, default=0, help="延迟的标准差 (毫秒)")
+    parser.add_argument('--rate-429', type=float, default=0, help="返回 429 的比例 (0~1)")
+    parser.add_argument('--rate-503', type=float, default=0, help="返回 503 的比例 (0~1)")
+    parser.add_argument('--encoding', default='recorded', choices=['recorded', 'utf-8', 'gbk'],
+                        help="正文编码：按录制原样，或统一转成 utf-8 / gbk")
+    parser.add_argument('--strip-charset', action='store_true', help="响应头里不带 charset")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子 (延迟、错误注入、任务顺序)")
+
+def server_options(args):
+    return {
+        'latency': args.latency, 'jitter': args.jitter,
+        'rate_429': args.rate_429, 'rate_503': args.rate_503,
+        'encoding': args.encoding, 'strip_charset': args.strip_charset, 'seed': args.seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫录制 / 离线回放 / 吞吐基准")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="真实运行爬虫并录制所有响应")
+    record_parser.add_argument('--archive', default=ARCHIVE_FILE)
+
+    serve_parser = commands.add_parser('serve', help="只启动本地回放服务")
+    add_server_options(serve_parser)
+    serve_parser.add_argument('--port', type=int, default=8001)
+
+    bench_parser = commands.add_parser('bench', help="对着回放服务完整运行 scraper.main() 并统计")
+    add_server_options(bench_parser)
+    bench_parser.add_argument('--existing', default=None, help="作为已有数据的词库文件 (测去重)")
+    bench_parser.add_argument('--keep-sleeps', action='store_true', help="保留爬虫里的礼貌等待")
+    bench_parser.add_argument('--verbose', action='store_true', help="显示爬虫自己的输出")
+    bench_parser.add_argument('--report', default=None, help="把结果写入 JSON 文件")
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        print("=== 录制爬虫响应 ===")
+        record(args.archive)
+        return
+
+    if not os.path.exists(args.archive):
+        print(f"❌ 找不到录制文件 {args.archive}，先运行: python crawl_replay.py record")
+        sys.exit(1)
+
+    if args.command == 'serve':
+        server = make_server(args.archive, server_options(args), args.port)
+        print(f"🎞️ 回放 {len(server.fixtures)} 个响应: http://{REPLAY_HOST}:{args.port}/replay?url=<原始地址>")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 已停止回放服务")
+        return
+
+    print("=== 爬虫离线基准 ===")
+    result = bench(args.archive, server_options(args), args.existing, args.keep_sleeps, args.verbose)
+    print(f"📊 请求 {result['pages']} 次 {result['statuses']}，用时 {result['wall_seconds']}s")
+    print(f"   {result['pages_per_second']} 页/秒，每页 CPU {result['cpu_ms_per_page']} ms")
+    print(f"   发现 {result['discovered']} 个关键词，去重后处理 {result['attempted']} 个")
+    for name, stats in result['extractors'].items():
+        print(f"   {name}: {stats['results']}/{stats['calls']} 成功 (产出率 {stats['yield_rate']})")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"📝 结果已写入 {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+# ================= 配置区 =================
+
+# 📦 部署差异清单：记录 public/ 下每个文件的 内容哈希 / 大小 / 修改时间，
+# 和"已部署"的清单比较，列出 新增 / 修改 / 删除 的文件。
+# 部署和 CDN 刷新只需要处理 DELTA_FILE 里的文件，而不是整个 182 MB 的目录。
+# 修改时间和大小都没变的文件直接沿用上次扫描的哈希，不重新读取内容。
+#
+# 已部署清单只在部署成功后用 `python deploy_manifest.py --commit` 前进，
+# 部署前连续构建多少次，差异都会一直累积，不会丢。
+
+OUTPUT_DIR = 'public'
+MANIFEST_FILE = 'deploy-manifest.json'   # 已部署的版本 (放在 public/ 外面，不会被部署)
+CURRENT_FILE = os.path.join('.build', 'current-manifest.json')   # 最近一次扫描的结果，只用来跳过没动过的文件
+DELTA_FILE = 'deploy-delta.json'
+MANIFEST_VERSION = 1
+
+# ==========================================
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def scan_tree(root):
+    """ 遍历输出目录，返回 {相对路径(/分隔): os.stat_result} """
+    found = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    rel = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    found[rel] = entry.stat(follow_symlinks=False)
+    return found
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('files', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+def build_manifest(root=OUTPUT_DIR, deployed=None, current=None, listing=None):
+    """ 返回 (当前清单, 差异)。差异是相对已部署清单的 {相对路径: 状态}，状态为 added / changed / removed
+    listing 为调用方已经扫描好的 scan_tree(root) 结果，省掉再遍历一次目录 """
+    deployed = load_manifest() if deployed is None else deployed
+    current = load_manifest(CURRENT_FILE) if current is None else current
+    listing = scan_tree(root) if listing is None else listing
+    files = {}
+    delta = {}
+    rehashed = 0
+
+    for rel, stat in listing.items():
+        old = current.get(rel)
+        if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime_ns:
+            # 大小和修改时间都没变：认为内容没变，沿用上次扫描的哈希
+            files[rel] = old
+        else:
+            files[rel] = {'hash': file_hash(os.path.join(root, rel)), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            rehashed += 1
+
+        live = deployed.get(rel)
+        if live is None:
+            delta[rel] = 'added'
+        elif live['hash'] != files[rel]['hash']:
+            delta[rel] = 'changed'
+        # 只是被重写了一遍 (touch) 但内容和线上相同，不算变化
+
+    for rel in deployed:
+        if rel not in files:
+            delta[rel] = 'removed'
+
+    print(f"🔍 共 {len(files)} 个文件，重新计算哈希 {rehashed} 个")
+    return files, delta
+
+def write_manifest(files, path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'root': OUTPUT_DIR, 'files': files},
+                  f, ensure_ascii=False, sort_keys=True)
+
+def save_manifest(files, delta):
+    """ 保存本次扫描结果和待部署的差异 (已部署清单不动)，返回各状态的数量 """
+    write_manifest(files, CURRENT_FILE)
+
+    # 给部署/刷新脚本用的差异文件：路径、状态、哈希、大小
+    changes = []
+    for rel, status in sorted(delta.items()):
+        info = files.get(rel, {})
+        changes.append({'path': rel, 'status': status, 'hash': info.get('hash'), 'size': info.get('size')})
+    summary = {status: sum(1 for s in delta.values() if s == status) for status in ('added', 'changed', 'removed')}
+    with open(DELTA_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'root': OUTPUT_DIR, 'summary': summary, 'changes': changes}, f, ensure_ascii=False, indent=2)
+    return summary
+
+def commit_delta():
+    """ 部署成功后调用：把差异文件里的变化记入已部署清单，返回记入的条数 """
+    if not os.path.exists(DELTA_FILE):
+        print(f"❌ 找不到差异文件 {DELTA_FILE}，请先构建")
+        return None
+    with open(DELTA_FILE, 'r', encoding='utf-8') as f:
+        changes = json.load(f)['changes']
+
+    # 按差异文件里记录的哈希记入 (部署的正是这份差异)，而不是重新扫描目录
+    deployed = load_manifest()
+    for change in changes:
+        if change['status'] == 'removed':
+            deployed.pop(change['path'], None)
+        else:
+            deployed[change['path']] = {'hash': change['hash'], 'size': change['size']}
+    write_manifest(deployed, MANIFEST_FILE)
+
+    with open(DELTA_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'root': OUTPUT_DIR, 'summary': {'added': 0, 'changed': 0, 'removed': 0}, 'changes': []},
+                  f, ensure_ascii=False, indent=2)
+    return len(changes)
+
+def main():
+    parser = argparse.ArgumentParser(description="生成部署差异清单")
+    parser.add_argument('--commit', action='store_true', help="部署成功后执行：把当前差异记为已部署，清空差异")
+    args = parser.parse_args()
+
+    if args.commit:
+        print("=== 记录已部署版本 ===")
+        count = commit_delta()
+        if count is None:
+            sys.exit(1)
+        print(f"✅ 已记入 {count} 个变化，清单: {MANIFEST_FILE}")
+        return
+
+    print("=== 生成部署差异清单 ===")
+    if not os.path.isdir(OUTPUT_DIR):
+        print(f"❌ 找不到输出目录 {OUTPUT_DIR}")
+        sys.exit(1)
+
+    files, delta = build_manifest()
+    summary = save_manifest(files, delta)
+    print(f"✅ 待部署: 新增 {summary['added']} / 修改 {summary['changed']} / 删除 {summary['removed']}")
+    print(f"   差异: {DELTA_FILE}，部署成功后运行 python deploy_manifest.py --commit")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import sys
+import json
+
+# ================= 词条数据模型 =================
+
+# 内存里的词条不再是三层嵌套 dict：用 __slots__ 类省掉每个对象的 __dict__，
+# 重复出现的文案 (爬虫写入的固定占位语、短名称) 全部共用同一个字符串对象，
+# 英文记录里和中文相同的字段直接引用中文那份 (爬虫的"双重保险"会整份复制)。
+# 读写 JSON 时与 symbols_updated.json 的原有格式完全一致。
+
+FIELDS = ('name', 'subname', 'summary', 'psych_1', 'psych_2', 'trad_good', 'trad_bad')
+_FIELD_SET = frozenset(FIELDS)
+
+# 原始 JSON 里的键顺序 (绝大多数记录相同，共用同一个 tuple)
+_KEY_ORDERS = {}
+
+# 爬虫反复写入的固定文案 (几千条词条里一字不差)
+SHARED_TEXTS = (
+    "",
+    "...",
+    "Interpretation",
+    "Content available in Chinese.",
+    "Chinese Source",
+    "Chinese Interpretation",
+    "This entry comes from a Chinese source.",
+    "Psychological interpretation available in summary.",
+    "（吉凶需根据具体情节分析）",
+)
+_SHARED = {text: sys.intern(text) for text in SHARED_TEXTS}
+
+# 爬虫在没有真正内容时写入的占位摘要 (英文记录里大部分是这种，见 scraper.py 的"双重保险")
+STUB_SUMMARIES = frozenset(_SHARED[text] for text in (
+    "",
+    "...",
+    "Content available in Chinese.",
+    "This entry comes from a Chinese source.",
+))
+
+# 不超过这个长度的文本都做 intern (名称、副标题、模板化的套话)
+INTERN_MAX_LEN = 128
+
+def share(text):
+    """ 返回可共用的字符串对象：固定文案和短文本只在内存里存一份 """
+    if not isinstance(text, str):
+        return text
+    shared = _SHARED.get(text)
+    if shared is not None:
+        return shared
+    if len(text) <= INTERN_MAX_LEN:
+        return sys.intern(text)
+    return text
+
+class LangRecord:
+    """ 某一种语言的词条内容 (name / subname / summary / psych_* / trad_*) """
+    __slots__ = FIELDS + ('extra', 'keys')
+
+    def __init__(self, name="", subname="", summary="", psych_1="", psych_2="", trad_good="", trad_bad="", extra=None,
+                 keys=None):
+        self.name = share(name)
+        self.subname = share(subname)
+        self.summary = share(summary)
+        self.psych_1 = share(psych_1)
+        self.psych_2 = share(psych_2)
+        self.trad_good = share(trad_good)
+        self.trad_bad = share(trad_bad)
+        self.extra = extra or None   # 模型之外的字段，原样保留以便写回
+        # 读入时实际出现的键 (按原顺序)；None 表示新建的记录，写回全部字段
+        self.keys = None if keys is None else _KEY_ORDERS.setdefault(tuple(keys), tuple(keys))
+
+    @classmethod
+    def from_dict(cls, data, base=None):
+        """ 从 JSON dict 构建；base 为另一种语言的记录，相同的字段直接引用它的对象 """
+        values = {}
+        for field in FIELDS:
+            value = data.get(field, "")
+            if base is not None and value == getattr(base, field):
+                value = getattr(base, field)
+            values[field] = value
+        extra = {k: v for k, v in data.items() if k not in _FIELD_SET}
+        return cls(extra=extra, keys=data.keys(), **values)
+
+    def to_dict(self):
+        """ 还原成 JSON dict：读入时有的键按原顺序写回，缺的字段 (且后来没被赋值) 不补 """
+        data = {}
+        for key in (FIELDS if self.keys is None else self.keys):
+            if key in _FIELD_SET:
+                data[key] = getattr(self, key)
+            elif self.extra and key in self.extra:
+                data[key] = self.extra[key]
+        for field in FIELDS:
+            if field not in data and getattr(self, field) != "":
+                data[field] = getattr(self, field)
+        if self.extra:
+            for key, value in self.extra.items():
+                data.setdefault(key, value)
+        return data
+
+    def is_placeholder(self):
+        """ 摘要只是爬虫写入的占位文案，没有实际内容 """
+        return self.summary in STUB_SUMMARIES
+
+    def __eq__(self, other):
+        return isinstance(other, LangRecord) and self.to_dict() == other.to_dict()
+
+    def __reduce__(self):
+        # 按位置序列化，不重复写字段名；同一批里共用的字符串只会被 pickle 一次
+        return (LangRecord, tuple(getattr(self, field) for field in FIELDS) + (self.extra, self.keys))
+
+class Entry:
+    """ 一个梦境词条：id、文件名、中英文内容和来源信息 """
+    __slots__ = ('id', 'filename', 'zh', 'en', 'meta', 'extra')
+
+    def __init__(self, id=None, filename=None, zh=None, en=None, meta=None, extra=None):
+        self.id = id
+        self.filename = filename
+        self.zh = zh
+        self.en = en
+        self.meta = meta
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        # 空对象 {} 也是一条 (空的) 记录，写回时仍是 {}；只有缺失或 null 才是 None
+        zh = LangRecord.from_dict(data['zh']) if data.get('zh') is not None else None
+        en = None
+        if data.get('en') is not None:
+            # 英文和中文整份相同时直接共用一个对象
+            en = zh if zh is not None and data['en'] == data['zh'] else LangRecord.from_dict(data['en'], base=zh)
+        meta = data.get('meta')
+        if meta:
+            meta = {share(k): share(v) if k == 'origin' else v for k, v in meta.items()}
+        extra = {k: v for k, v in data.items() if k not in cls.__slots__}
+        return cls(data.get('id'), data.get('filename'), zh, en, meta, extra)
+
+    def to_dict(self):
+        """ 还原成 symbols_updated.json 里的格式 (字段顺序与爬虫写入时一致) """
+        data = {}
+        if self.id is not None:
+            data['id'] = self.id
+        if self.filename is not None:
+            data['filename'] = self.filename
+        if self.zh is not None:
+            data['zh'] = self.zh.to_dict()
+        if self.en is not None:
+            data['en'] = self.en.to_dict()
+        if self.meta is not None:
+            data['meta'] = self.meta
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def record(self, lang):
+        """ 取某种语言的内容 ('zh' / 'en')，没有则返回 None """
+        return self.zh if lang == 'zh' else self.en if lang == 'en' else None
+
+    def __eq__(self, other):
+        return isinstance(other, Entry) and self.to_dict() == other.to_dict()
+
+    def __reduce__(self):
+        return (Entry, (self.id, self.filename, self.zh, self.en, self.meta, self.extra))
+
+def load_entries(path):
+    """ 读取数据文件，返回 Entry 列表 """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Entry.from_dict(item) for item in json.load(f)]
+
+def dump_entries(entries, path):
+    """ 写回数据文件，格式与原来的 json.dump(..., indent=2) 一致 """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([entry.to_dict() for entry in entries], f, ensure_ascii=False, indent=2)
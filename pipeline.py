@@ -0,0 +1,417 @@
+import os
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+import build_site
+import add_ads
+import build_css
+import deploy_manifest
+import validate_site
+from build_css import apply_stylesheet, load_stylesheet_href
+from entries import load_entries
+from related import compute_related, entry_key
+
+# ================= 配置区 =================
+
+# 🏭 统一构建流水线：取代依次手动运行 build_site.py / add_ads.py / generate-sitemap.py 的做法。
+# 阶段：load -> render -> index -> sitemap -> css -> inject -> rewrites -> compress (-> manifest)
+# 每个阶段声明自己的输入和输出，输入指纹和结果缓存在 CACHE_FILE 里；
+# 一次运行只执行输入有变化 (或输出丢失) 的阶段，数据只加载一次，输出目录最多遍历一次。
+# css 阶段按页面里用到的 class 集合决定是否重新编译 (需要 Node.js，没有 npx 时跳过并提示)，
+# 样式表地址变了由 inject 阶段统一改写所有页面。
+
+CACHE_FILE = os.path.join('.build', 'pipeline-cache.json')
+CACHE_VERSION = 2
+
+# 参与缓存判断的构建代码：改了代码等于改了输入
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_FILES = ['build_site.py', 'related.py', 'add_ads.py', 'build_css.py']
+# 这些文件的配置区不算进代码指纹 (否则切换布局之类的开关也会触发全部重建)，
+# 配置区里影响输出的开关由各阶段的输入单独列出
+CONFIG_EXCLUDED = {'build_site.py'}
+CONFIG_BEGIN = '# ================= 配置区 ================='
+SECTION_PREFIX = '# ================='
+
+# compress 阶段预压缩的文件 (相对 OUTPUT_DIR)
+COMPRESS_FILES = ['sitemap.xml']
+
+WORKERS = os.cpu_count() or 4
+
+# ==========================================
+
+def digest(*values):
+    """ 任意 JSON 值的稳定指纹 """
+    raw = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def file_digest(path):
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def code_digest(name):
+    path = os.path.join(SCRIPT_DIR, name)
+    if name not in CONFIG_EXCLUDED or not os.path.exists(path):
+        return file_digest(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    kept = []
+    inside = False
+    for line in lines:
+        if line.strip() == CONFIG_BEGIN:
+            inside = True
+        elif inside and line.startswith(SECTION_PREFIX):
+            inside = False
+        if not inside:
+            kept.append(line)
+    return digest(kept)
+
+def postprocess_batch(args):
+    """ inject 阶段子进程入口：统一样式表引用和广告加载方式，返回修改过的文件 """
+    paths, ad_mode, css_href = args
+    changed = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content = add_ads.apply_ad_mode(apply_stylesheet(content, css_href), ad_mode)
+        if new_content != content:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            changed.append(path)
+    return changed
+
+class Pipeline:
+    def __init__(self, force=False):
+        self.force = force
+        self.cache = self.load_cache()
+        self.state = {}
+        self._data = None
+        self._template = None
+        self._files = None
+        self.written = set()    # 本次运行写过的 HTML (css 阶段只需要扫描这些)
+        self._classes = None
+
+    # --- 共享资源 (懒加载，每次运行最多一次) ---
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = load_entries(build_site.DATA_FILE)
+            print(f"📚 加载了 {len(self._data)} 条数据")
+        return self._data
+
+    @property
+    def template(self):
+        if self._template is None:
+            self._template = apply_stylesheet(build_site.load_template(), load_stylesheet_href())
+        return self._template
+
+    @property
+    def files(self):
+        """ 输出目录快照 {相对路径: stat}：整个运行只遍历一次，之后各阶段写了哪些文件就单独更新哪些 """
+        if self._files is None:
+            build_site.ensure_dir(build_site.OUTPUT_DIR)
+            self._files = deploy_manifest.scan_tree(build_site.OUTPUT_DIR)
+        return self._files
+
+    def rel(self, path):
+        """ 输出目录里的相对路径 (/分隔)；不在输出目录里返回 None """
+        rel = os.path.relpath(path, build_site.OUTPUT_DIR)
+        return None if rel.startswith('..') else rel.replace(os.sep, '/')
+
+    def exists(self, path):
+        rel = self.rel(path)
+        return rel in self.files if rel is not None else os.path.exists(path)
+
+    def refresh(self, path):
+        """ 文件被写入/删除后更新快照 """
+        rel = self.rel(path)
+        if rel is None:
+            return
+        try:
+            self.files[rel] = os.stat(path)
+        except FileNotFoundError:
+            self.files.pop(rel, None)
+            self.written.discard(path)
+            return
+        if rel.endswith('.html'):
+            self.written.add(path)
+
+    def page_listing(self):
+        """ 从快照里取出各语言目录下的页面 {语言: {文件名: 路径}} """
+        listing = {}
+        for lang, directory in build_site.LANG_DIRS.items():
+            prefix = self.rel(directory) + '/'
+            listing[lang] = {posixpath.basename(rel): os.path.join(build_site.OUTPUT_DIR, *rel.split('/'))
+                             for rel in self.files if rel.startswith(prefix) and rel.endswith('.html')}
+        return listing
+
+    # --- 缓存 ---
+
+    def load_cache(self):
+        if not os.path.exists(CACHE_FILE):
+            return {}
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache.get('stages', {}) if cache.get('version') == CACHE_VERSION else {}
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'stages': self.cache}, f, ensure_ascii=False)
+
+    # --- 阶段定义 ---
+
+    def stages(self):
+        """ (名称, 输入函数, 输出文件列表, 执行函数)，按顺序执行
+        输出也可以是函数：按上次的结果算出应有的文件，阶段自己逐个补齐缺失的输出 """
+        out = build_site.OUTPUT_DIR
+        return [
+            ('load', self.load_inputs, [], self.run_load),
+            ('render', self.render_inputs, self.render_outputs, self.run_render),
+            ('index', self.index_inputs, [os.path.join(out, 'index.html')], self.run_index),
+            ('sitemap', self.sitemap_inputs, [os.path.join(out, 'sitemap.xml')], self.run_sitemap),
+            ('css', self.css_inputs, [build_css.CSS_MANIFEST], self.run_css),
+            ('inject', self.inject_inputs, [], self.run_inject),
+            ('rewrites', self.rewrites_inputs,
+             [build_site.rewrite_function_path(lang) for lang in build_site.LANG_DIRS]
+             if build_site.DREAMS_LAYOUT != 'flat' else [], self.run_rewrites),
+            ('compress', self.compress_inputs,
+             [os.path.join(out, name + '.gz') for name in COMPRESS_FILES], self.run_compress),
+        ]
+
+    def load_inputs(self):
+        return [file_digest(build_site.DATA_FILE)]
+
+    def run_load(self, previous):
+        # 索引页和 sitemap 只关心 文件名/名称/是否有英文版，单独做一个指纹
+        listing = [(item.filename, item.zh.name if item.zh else None, build_site.has_page(item, 'en'))
+                   for item in self.data]
+        return {'data': self.load_inputs()[0], 'listing': digest(listing)}
+
+    def render_inputs(self):
+        # 样式表地址不算在内：地址变了由 inject 阶段改写，不需要重新渲染
+        config = [build_site.SEO_SHUFFLE_SALT, build_site.RELATED_ENABLED, build_site.DOMAIN, build_site.LANG_DIRS,
+                  add_ads.AD_LOAD_MODE]
+        code = [code_digest(name) for name in CODE_FILES]
+        layout = [build_site.DREAMS_LAYOUT, build_site.SHARD_WIDTH]
+        return [self.state['load'], file_digest(build_site.TEMPLATE_FILE), config, code, layout]
+
+    def render_outputs(self, state):
+        """ 上次渲染出的全部词条页面 """
+        return [build_site.page_path(lang, filename)
+                for _, filename, langs in state.get('entries', {}).values() for lang in langs]
+
+    def run_render(self, previous):
+        for directory in build_site.LANG_DIRS.values():
+            build_site.ensure_dir(directory)
+        # 先把已有页面挪到当前布局的位置；布局不计入下面的全局指纹，切换布局不会触发全部重建
+        before = self.page_listing()
+        after = build_site.relocate_pages(before)
+        for lang, pages in after.items():
+            for filename, path in pages.items():
+                if path != before[lang][filename]:
+                    self.refresh(before[lang][filename])
+                    self.refresh(path)
+
+        data = self.data
+        related_map = compute_related(data) if build_site.RELATED_ENABLED else {}
+        by_key = {entry_key(item): item for item in data}
+
+        # 模板/配置/代码没变时只重建内容 (含相关链接) 有变化的词条
+        global_fp = digest(self.render_inputs()[1:4])
+        old_entries = previous.get('entries', {}) if previous.get('global') == global_fp else {}
+        entries = {}
+        rendered = 0
+        for item in data:
+            key = entry_key(item)
+            if not key or not item.filename:
+                continue
+            related = [by_key[k] for k in related_map.get(key, [])]
+            # 相关链接里用到的是邻居的文件名和各语言名称，邻居改名也要重建这一页
+            neighbours = [build_site.related_link(other) for other in related]
+            fp = digest(item.to_dict(), neighbours)
+            langs = [lang for lang in build_site.LANG_DIRS if build_site.has_page(item, lang)]
+            entries[key] = [fp, item.filename, langs]
+            # 内容没变、页面也都还在才跳过 (页面被误删时只补这一个词条)
+            missing = any(not self.exists(build_site.page_path(lang, item.filename)) for lang in langs)
+            if old_entries.get(key, [None])[0] != fp or missing:
+                build_site.generate_page(item, self.template, {}, related)
+                for lang in build_site.LANG_DIRS:
+                    self.refresh(build_site.page_path(lang, item.filename))
+                rendered += 1
+
+        # 删除已经不在数据里、或者换了文件名的词条的旧页面
+        kept = {filename for _, filename, _ in entries.values()}
+        for key, (_, filename, _) in previous.get('entries', {}).items():
+            if filename not in kept:
+                for lang in build_site.LANG_DIRS:
+                    path = build_site.page_path(lang, filename)
+                    if self.exists(path):
+                        os.remove(path)
+                        self.refresh(path)
+        print(f"   重建 {rendered} 个词条, 跳过 {len(entries) - rendered} 个未变化的词条")
+        return {'global': global_fp, 'entries': entries}
+
+    def page_classes(self):
+        """ 页面里用到的全部 class：上次的集合 + 本次写过的页面；第一次 (或 --force) 扫描全部页面 """
+        if self._classes is None:
+            previous = self.cache.get('css', {}).get('state', {}).get('classes')
+            if previous is None or self.force:
+                paths = [os.path.join(build_site.OUTPUT_DIR, *rel.split('/')) for rel in sorted(self.files)
+                         if rel.endswith('.html')]
+                self._classes = build_css.collect_all_classes(paths)
+            else:
+                self._classes = set(previous) | build_css.collect_all_classes(sorted(self.written))
+        return self._classes
+
+    def css_inputs(self):
+        if not build_css.tailwind_available():
+            # 没有 Node.js 时不去扫描页面，run_css 会提示并跳过
+            return [None]
+        return [sorted(self.page_classes()), build_css.TAILWIND_CMD, code_digest('build_css.py')]
+
+    def run_css(self, previous):
+        if not build_css.tailwind_available():
+            print(f"⚠️ 找不到 {build_css.TAILWIND_CMD[0]} (需要 Node.js)，跳过样式表编译，页面继续使用现有样式")
+            return None
+        classes = self.page_classes()
+        print(f"   共 {len(classes)} 个不同的 class")
+        href = build_css.build_stylesheet(classes)
+        if href is None:
+            return None
+        # 样式表目录里的文件有增有删，更新快照
+        assets = self.rel(build_css.ASSETS_DIR) + '/'
+        for rel in [rel for rel in self.files if rel.startswith(assets)]:
+            self.refresh(os.path.join(build_site.OUTPUT_DIR, *rel.split('/')))
+        for path in os.listdir(build_css.ASSETS_DIR):
+            self.refresh(os.path.join(build_css.ASSETS_DIR, path))
+        self.refresh(build_css.HEADERS_FILE)
+        return {'classes': sorted(classes), 'href': href}
+
+    def inject_inputs(self):
+        return [add_ads.AD_LOAD_MODE, load_stylesheet_href(), code_digest('add_ads.py')]
+
+    def run_inject(self, previous):
+        paths = [os.path.join(build_site.OUTPUT_DIR, *rel.split('/')) for rel in sorted(self.files)
+                 if any(rel.endswith(ext) for ext in add_ads.TARGET_EXTENSIONS)]
+        batches = [(paths[i:i + 500], add_ads.AD_LOAD_MODE, load_stylesheet_href()) for i in range(0, len(paths), 500)]
+        changed = 0
+        with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+            for written in pool.map(postprocess_batch, batches):
+                for path in written:
+                    self.refresh(path)
+                changed += len(written)
+        print(f"   扫描 {len(paths)} 个页面，更新 {changed} 个")
+        return {}
+
+    def index_inputs(self):
+        return [self.state['load']['listing'], add_ads.AD_LOAD_MODE, load_stylesheet_href(), code_digest('build_site.py')]
+
+    def run_index(self, previous):
+        build_site.generate_index_page(self.data)
+        return {}
+
+    def sitemap_inputs(self):
+        return [self.state['load']['listing'], build_site.DOMAIN, code_digest('build_site.py')]
+
+    def run_sitemap(self, previous):
+        build_site.generate_sitemap(self.data)
+        return {}
+
+    def rewrites_inputs(self):
+        # 改写函数在请求时才算子目录，只跟布局有关，跟词条列表无关
+        return [build_site.DREAMS_LAYOUT, build_site.SHARD_WIDTH, build_site.FUNCTIONS_DIR, code_digest('build_site.py')]
+
+    def run_rewrites(self, previous):
+        build_site.generate_rewrites()
+        return {}
+
+    def compress_inputs(self):
+        return [file_digest(os.path.join(build_site.OUTPUT_DIR, name)) for name in COMPRESS_FILES]
+
+    def run_compress(self, previous):
+        for name in COMPRESS_FILES:
+            path = os.path.join(build_site.OUTPUT_DIR, name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                raw = f.read()
+            # mtime=0：同样的内容压缩出同样的字节
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+        return {}
+
+    # --- 调度 ---
+
+    def run(self):
+        for name, inputs, outputs, action in self.stages():
+            fingerprint = digest(inputs())
+            cached = self.cache.get(name, {})
+            per_item = callable(outputs)
+            expected = outputs(cached.get('state', {})) if per_item else outputs
+            outputs_ok = all(self.exists(path) for path in expected)
+            if not self.force and cached.get('inputs') == fingerprint and outputs_ok:
+                print(f"⏭️  [{name}] 输入未变化，使用缓存")
+                self.state[name] = cached.get('state', {})
+                continue
+
+            print(f"▶️  [{name}] 执行中...")
+            # 逐个检查输出的阶段自己会补齐缺失的文件，上次的结果照样可用
+            state = action(cached.get('state', {}) if outputs_ok or per_item else {})
+            if state is None:
+                # 阶段没能完成 (例如缺少外部工具)：不写缓存，下次再试
+                self.state[name] = cached.get('state', {})
+                continue
+            self.state[name] = state
+            for path in ([] if per_item else outputs):
+                self.refresh(path)
+            self.cache[name] = {'inputs': fingerprint, 'state': self.state[name]}
+            self.save_cache()
+
+        # 部署差异清单本身就是增量的 (按修改时间/大小跳过没动过的文件)，每次都生成；
+        # 差异相对已部署的版本计算，部署前多次构建也会累积
+        print("▶️  [manifest] 执行中...")
+        files, delta = deploy_manifest.build_manifest(build_site.OUTPUT_DIR, listing=self.files)
+        summary = deploy_manifest.save_manifest(files, delta)
+        print(f"   待部署: 新增 {summary['added']} / 修改 {summary['changed']} / 删除 {summary['removed']}"
+              f" (部署成功后运行 python deploy_manifest.py --commit)")
+
+def main():
+    parser = argparse.ArgumentParser(description="DreamWhisper 统一构建流水线")
+    parser.add_argument('--force', action='store_true', help="忽略缓存，重新执行所有阶段")
+    parser.add_argument('--validate', action='store_true', help="构建完成后校验整个站点，有问题时以退出码 1 结束")
+    args = parser.parse_args()
+
+    print("=== 构建流水线启动 ===")
+    if not os.path.exists(build_site.DATA_FILE):
+        print(f"❌ 找不到数据文件 {build_site.DATA_FILE}")
+        sys.exit(1)
+    if build_site.load_template() is None:
+        sys.exit(1)
+
+    pipeline = Pipeline(force=args.force)
+    pipeline.run()
+    if args.validate:
+        print("▶️  [validate] 执行中...")
+        result = validate_site.validate(build_site.OUTPUT_DIR, listing=pipeline.files)
+        print(f"   错误 {sum(result['errors'].values())} / 警告 {sum(result['warnings'].values())}，"
+              f"详见 {validate_site.REPORT_FILE}")
+        if not result['ok']:
+            sys.exit(1)
+    print("🎉 所有任务全部完成！")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import math
+import hashlib
+
+import numpy as np
+from scipy import sparse
+
+# ================= 配置区 =================
+
+# "相关梦境" 预计算：把每个词条的中英文摘要做成稀疏 TF-IDF 矩阵，
+# 分块做稀疏矩阵乘法求余弦相似度的 top-k，避免 O(n²) 的两两比较。
+# 结果按内容哈希缓存，下次构建只重算变化的词条。
+# 词表和 IDF 权重也存进缓存：增量计算沿用同一套权重，结果与用这套权重全量计算完全一致；
+# 只有全量重算时才重新统计词表和 IDF。
+
+RELATED_TOP_K = 6          # 每个页面展示几个相关梦境
+CHUNK_NNZ = 4_000_000      # 每块乘积预计的非零元个数上限 (控制内存峰值，按行的实际密度分块)
+MIN_SCORE = 0.05           # 相似度太低的不算"相关"
+MIN_DF = 2                 # 只出现在一个词条里的词对相似度没有贡献
+MAX_DF_RATIO = 0.02        # 超过 2% 词条都有的词 ("梦见"之类的套话) 不参与计算
+MAX_DF = 500               # 同上，按绝对数量封顶 (词条越多，比例上限越松)
+MAX_TERMS_PER_ROW = 32     # 每个词条只保留权重最高的若干个词，长摘要不会和所有词条都沾边
+FULL_RECOMPUTE_RATIO = 0.2 # 变化超过 20% 时直接全量重算 (IDF 权重也会明显变化)
+
+CACHE_FILE = os.path.join('.build', 'related-cache.json')
+CACHE_VERSION = 2
+SCORE_DIGITS = 6           # 分数保留的小数位 (缓存里的和新算的按同样精度比较)
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+CJK_PATTERN = re.compile(r'[一-鿿]+')
+WORD_PATTERN = re.compile(r"[a-z][a-z']+")
+EN_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does dream dreams dreaming dreamed for from has have
+if in into is it its may mean means meaning of on or that the their them this to was were
+what when which who will with you your
+""".split())
+
+# ==========================================
+
+def entry_key(item):
+    return item.id or item.filename
+
+def entry_text(item):
+    """ 参与相似度计算的文本：中英文的名称和摘要 """
+    parts = []
+    for lang in ('zh', 'en'):
+        record = item.record(lang)
+        if record:
+            parts.append(record.name)
+            parts.append(record.summary)
+    return TAG_PATTERN.sub(' ', '\n'.join(parts))
+
+def content_hash(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+def tokenize(text):
+    """ 中文按字做二元组 (bigram)，英文按单词，去掉停用词 """
+    tokens = []
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word not in EN_STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+def build_weights(counts):
+    """ 统计词表和 IDF：{'terms': [词, ...], 'idf': [权重, ...]} (第 i 个词就是矩阵第 i 列) """
+    n = len(counts)
+    df = {}
+    for tf in counts:
+        for token in tf:
+            df[token] = df.get(token, 0) + 1
+
+    max_df = max(MIN_DF, min(MAX_DF, int(n * MAX_DF_RATIO)))
+    terms = []
+    idf = []
+    for token, freq in df.items():
+        if MIN_DF <= freq <= max_df:
+            terms.append(token)
+            idf.append(math.log((1 + n) / (1 + freq)) + 1)
+    return {'terms': terms, 'idf': idf}
+
+def build_matrix(token_lists, weights=None):
+    """ 构建行归一化的 TF-IDF 稀疏矩阵 (CSR)，每行一个词条；返回 (矩阵, 词表和 IDF)
+    weights 为之前统计好的词表和 IDF (增量计算时沿用)，不传则按这批词条重新统计 """
+    n = len(token_lists)
+    counts = []
+    for tokens in token_lists:
+        tf = {}
+        for token in tokens:
+            tf[token] = tf.get(token, 0) + 1
+        counts.append(tf)
+
+    weights = build_weights(counts) if weights is None else weights
+    vocab = {token: col for col, token in enumerate(weights['terms'])}
+    idf = weights['idf']
+
+    indptr = [0]
+    indices = []
+    data = []
+    for tf in counts:
+        row = []
+        for token, freq in tf.items():
+            col = vocab.get(token)
+            if col is not None:
+                row.append((col, (1 + math.log(freq)) * idf[col]))
+        if len(row) > MAX_TERMS_PER_ROW:
+            row.sort(key=lambda pair: (-pair[1], pair[0]))
+            row = row[:MAX_TERMS_PER_ROW]
+        for col, weight in row:
+            indices.append(col)
+            data.append(weight)
+        indptr.append(len(indices))
+
+    # float64：A·B 和 B·A 两个方向算出的分数要一致 (增量计算会用到对称性)
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(n, len(vocab))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr(), weights
+
+def row_chunks(matrix, matrix_t, rows):
+    """ 按乘积预计的非零元个数分块：每行最多和 (它每个词的 df 之和) 个词条有交集 """
+    df = np.diff(matrix_t.indptr)
+    cost = sparse.csr_matrix((df[matrix.indices], matrix.indices, matrix.indptr), shape=matrix.shape)
+    row_cost = np.minimum(np.asarray(cost.sum(axis=1)).ravel(), matrix.shape[0])
+    chunk, total = [], 0
+    for row in rows:
+        if chunk and total + row_cost[row] > CHUNK_NNZ:
+            yield chunk
+            chunk, total = [], 0
+        chunk.append(row)
+        total += row_cost[row]
+    if chunk:
+        yield chunk
+
+def top_k_rows(matrix, matrix_t, rows, k):
+    """ 分块计算指定行的 top-k 近邻，返回 {行号: [(列号, 分数), ...]} """
+    result = {}
+    for chunk in row_chunks(matrix, matrix_t, rows):
+        scores = matrix[chunk].dot(matrix_t).tocsr()
+        for offset, row in enumerate(chunk):
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            cols = scores.indices[lo:hi]
+            vals = np.round(scores.data[lo:hi], SCORE_DIGITS)
+            keep = (cols != row) & (vals >= MIN_SCORE)
+            cols, vals = cols[keep], vals[keep]
+            # 分数相同按行号排，保证每次构建结果一致 (先整体排序再截取，并列的也不会随机取舍)
+            order = np.lexsort((cols, -vals))[:k]
+            result[row] = [(int(cols[i]), float(vals[i])) for i in order]
+    return result
+
+def load_cache():
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    params = cache.get('params')
+    if cache.get('version') != CACHE_VERSION or params != cache_params() or not cache.get('weights'):
+        return {}
+    return cache
+
+def save_cache(entries, weights):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        # json.dumps 走 C 实现，比 json.dump 直接写文件快得多
+        f.write(json.dumps({'version': CACHE_VERSION, 'params': cache_params(), 'weights': weights, 'entries': entries},
+                           ensure_ascii=False))
+
+def cache_params():
+    return {'k': RELATED_TOP_K, 'min_score': MIN_SCORE, 'min_df': MIN_DF, 'max_df_ratio': MAX_DF_RATIO,
+            'max_df': MAX_DF, 'max_terms': MAX_TERMS_PER_ROW}
+
+def compute_related(data, k=RELATED_TOP_K):
+    """ 返回 {词条 key: [相关词条 key, ...]}，按相似度从高到低 """
+    items = [item for item in data if entry_key(item)]
+    keys = [entry_key(item) for item in items]
+    if len(items) < 2:
+        return {key: [] for key in keys}
+
+    texts = [entry_text(item) for item in items]
+    hashes = [content_hash(text) for text in texts]
+    row_of = {key: row for row, key in enumerate(keys)}
+
+    cache = load_cache()
+    cached = cache.get('entries', {})
+    changed = [row for row, key in enumerate(keys) if cached.get(key, {}).get('hash') != hashes[row]]
+    removed = set(cached) - set(keys)
+    if not changed and not removed:
+        print("🔗 相关梦境：全部命中缓存")
+        return {key: [n for n, _ in cached[key]['related']] for key in keys}
+
+    token_lists = [tokenize(text) for text in texts]
+    neighbours = {}
+    if not cached or len(changed) > len(keys) * FULL_RECOMPUTE_RATIO:
+        print(f"🔗 相关梦境：全量计算 {len(keys)} 个词条...")
+        matrix, weights = build_matrix(token_lists)
+        matrix_t = matrix.T.tocsr()
+        neighbours = top_k_rows(matrix, matrix_t, list(range(len(keys))), k)
+    else:
+        print(f"🔗 相关梦境：增量计算 {len(changed)} 个变化的词条...")
+        # 沿用缓存里的词表和 IDF：没变化的词条向量不变，缓存的分数依然有效
+        matrix, weights = build_matrix(token_lists, cache['weights'])
+        matrix_t = matrix.T.tocsr()
+        changed_keys = {keys[row] for row in changed} | removed
+        # 变化的词条重新算；缓存里的近邻包含变化/删除词条的也要重算 (它们的分数失效了)
+        dirty = set(changed)
+        for row, key in enumerate(keys):
+            if row not in dirty and any(n in changed_keys for n, _ in cached[key]['related']):
+                dirty.add(row)
+        neighbours = top_k_rows(matrix, matrix_t, sorted(dirty), k)
+
+        # 其余词条：缓存的近邻 + 与变化词条的新分数 (相似度对称，变化词条那几行就是其余词条对应的列)
+        incoming = {}
+        changed_scores = matrix[changed].dot(matrix_t).tocoo()
+        for i, col, score in zip(changed_scores.row, changed_scores.col, np.round(changed_scores.data, SCORE_DIGITS)):
+            source = changed[i]
+            if col != source and col not in dirty and score >= MIN_SCORE:
+                incoming.setdefault(int(col), []).append((source, float(score)))
+        for row, key in enumerate(keys):
+            if row in dirty:
+                continue
+            candidates = [(row_of[n], score) for n, score in cached[key]['related']]
+            candidates.extend(incoming.get(row, []))
+            candidates.sort(key=lambda pair: (-pair[1], pair[0]))
+            neighbours[row] = candidates[:k]
+
+    entries = {}
+    for row, key in enumerate(keys):
+        entries[key] = {
+            'hash': hashes[row],
+            'related': [[keys[col], score] for col, score in neighbours.get(row, [])]
+        }
+    save_cache(entries, weights)
+    return {key: [n for n, _ in entries[key]['related']] for key in keys}
@@ -1,12 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
-import json
 import time
 import random
 import re
 import os
 import hashlib
-from urllib.parse import urljoin, unquote, quote
+import json
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, unquote, quote, urlsplit
+
+from entries import Entry, LangRecord, load_entries, dump_entries
 
 # --- 配置 ---
 OUTPUT_FILE = 'symbols_updated.json'
@@ -15,6 +19,19 @@ HEADERS = {
     'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
 }
 
+# --- 自适应限速 (每个网站单独控制请求速率，AIMD：顺利就慢慢加速，被限流/变慢就减半) ---
+INITIAL_RATE = 0.5        # 每个网站的起始速率 (请求/秒)
+MIN_RATE = 0.1
+MAX_RATE = 2.0            # 速率上限：再顺利也不超过这个值
+RATE_INCREASE = 0.1       # 每次成功响应加多少 (加性增)
+RATE_DECREASE = 0.5       # 429/503/超时/响应变慢时乘以多少 (乘性减)
+SLOW_LATENCY = 5.0        # 响应超过这么多秒算"对方吃力了"
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 2           # 429/503 时最多重试几次
+MAX_RETRY_AFTER = 120     # Retry-After 最多等多久 (秒)
+RUN_TIME_BUDGET = None    # 单次运行的时间预算 (秒)，None 为不限；用完后保存进度并退出
+STATS_FILE = os.path.join('.build', 'crawl-stats.json')   # 各网站的历史产出率，决定先抓谁
+
 # --- 1. 强力黑名单 (过滤无效词/品牌词/导航词/乱码) ---
 BLACKLIST_KEYWORDS = [
     "Dream Interpreter AI", "Dream Interpreter", "DreamMoods", "Psychologist World",
@@ -76,6 +93,127 @@ def generate_seo_filename(keyword):
         return f"symbol-{random.randint(10000,99999)}.html"
     return f"{clean_key}.html"
 
+# ==========================================
+# PART 0: 自适应限速 (Throttle)
+# ==========================================
+
+def source_of(url):
+    """按域名区分来源"""
+    return urlsplit(url).netloc.lower()
+
+def parse_retry_after(value):
+    """Retry-After 可能是秒数，也可能是 HTTP 日期"""
+    if not value: return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+class SourceThrottle:
+    """单个网站的速率控制器 + 产出统计"""
+
+    def __init__(self, source, attempts=0, successes=0):
+        self.source = source
+        self.rate = INITIAL_RATE
+        self.next_time = 0.0       # 下一次允许发请求的时间
+        self.latency = None        # 响应时间的滑动平均
+        self.requests = 0
+        self.errors = 0
+        self.attempts = attempts   # 历史 + 本次：处理过的词条数
+        self.successes = successes # 历史 + 本次：成功提取的词条数
+
+    def ready_in(self):
+        return max(0.0, self.next_time - time.time())
+
+    def wait(self):
+        delay = self.ready_in()
+        if delay > 0:
+            time.sleep(delay)
+
+    def observe(self, latency, status=None, retry_after=None):
+        """根据一次请求的结果调整速率；status 为 None 表示请求异常 (超时/连接失败)"""
+        self.requests += 1
+        overloaded = status is None or status in RETRY_STATUSES
+        slow = latency > SLOW_LATENCY or (self.latency is not None and latency > max(1.0, 3 * self.latency))
+        if overloaded:
+            self.errors += 1
+        if overloaded or slow:
+            self.rate = max(MIN_RATE, self.rate * RATE_DECREASE)
+        else:
+            self.rate = min(MAX_RATE, self.rate + RATE_INCREASE)
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        self.next_time = time.time() + max(1.0 / self.rate, retry_after or 0.0)
+
+    def yield_rate(self):
+        """成功率估计 (没有记录时按乐观的 1/1 起步，新网站也有机会排到前面)"""
+        return (self.successes + 1) / (self.attempts + 1)
+
+_throttles = {}
+
+def get_throttle(url):
+    source = source_of(url)
+    if source not in _throttles:
+        _throttles[source] = SourceThrottle(source)
+    return _throttles[source]
+
+def load_source_stats():
+    if not os.path.exists(STATS_FILE): return
+    try:
+        with open(STATS_FILE, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return
+    for source, s in stats.items():
+        _throttles[source] = SourceThrottle(source, s.get('attempts', 0), s.get('successes', 0))
+
+def save_source_stats():
+    os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
+    stats = {t.source: {'attempts': t.attempts, 'successes': t.successes} for t in _throttles.values()}
+    with open(STATS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+
+def fetch(url, timeout=10):
+    """带限速的 GET：按该网站当前速率等待，遇到 429/503 按 Retry-After 退避后重试"""
+    throttle = get_throttle(url)
+    for attempt in range(MAX_RETRIES + 1):
+        throttle.wait()
+        started = time.time()
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=timeout)
+        except requests.RequestException:
+            throttle.observe(time.time() - started)
+            raise
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        throttle.observe(time.time() - started, response.status_code, retry_after)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        print(f"     {throttle.source} 返回 {response.status_code}，降速到 {throttle.rate:.2f} 次/秒后重试")
+
+def schedule_tasks(tasks):
+    """按网站分队列：能立即请求的网站里先抓产出率高的；都在冷却时挑最快可以请求的那个"""
+    queues = {}
+    for task in tasks:
+        queues.setdefault(source_of(task['url']), deque()).append(task)
+    while queues:
+        throttles = {source: get_throttle(queue[0]['url']) for source, queue in queues.items()}
+        ready = [source for source, t in throttles.items() if t.ready_in() == 0]
+        if ready:
+            source = max(ready, key=lambda s: throttles[s].yield_rate())
+        else:
+            source = min(throttles, key=lambda s: throttles[s].ready_in())
+        yield queues[source].popleft()
+        if not queues[source]:
+            del queues[source]
+
+def print_throttle_summary():
+    for t in sorted(_throttles.values(), key=lambda t: -t.requests):
+        if t.requests:
+            print(f"  {t.source}: {t.requests} 次请求, {t.errors} 次限流/出错, 最终速率 {t.rate:.2f} 次/秒")
+
 # ==========================================
 # PART 1: 关键词发现 (Crawler)
 # ==========================================
@@ -89,7 +227,10 @@ def crawl_generic_sites(urls, lang='en'):
         print(f"  -> 正在抓取索引: {index_url} ...")
         try:
             # 针对不同站点可能需要微调编码
-            response = requests.get(index_url, headers=HEADERS, timeout=15)
+            response = fetch(index_url, timeout=15)
+            if response.status_code != 200:
+                print(f"     抓取失败 {index_url}: HTTP {response.status_code}")
+                continue
             
             # 尝试自动检测编码 (尤其是中文站)
             if lang == 'zh':
@@ -150,7 +291,6 @@ def crawl_generic_sites(urls, lang='en'):
                         count_found += 1
             
             print(f"     发现 {count_found} 个潜在词条")
-            time.sleep(1) # 礼貌爬取
             
         except Exception as e:
             print(f"     抓取失败 {index_url}: {e}")
@@ -163,7 +303,7 @@ def crawl_keywords_from_dreaminterpreter():
     print(f"正在发现关键词 (DreamInterpreter)...")
     discovered = []
     try:
-        response = requests.get(index_url, headers=HEADERS, timeout=15)
+        response = fetch(index_url, timeout=15)
         soup = BeautifulSoup(response.text, 'html.parser')
         links = soup.find_all('a', href=re.compile(r'/definition/'))
         for link in links:
@@ -197,7 +337,7 @@ def extract_dreaminterpreter(keyword):
     # 专用提取器
     url = f"https://dreaminterpreter.ai/zh-tw/dream-dictionary/definition/{quote(keyword)}"
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch(url)
         if response.status_code != 200: return None
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -234,7 +374,8 @@ def extract_dreaminterpreter(keyword):
 def extract_generic_chinese(url, keyword):
     """通用中文提取器 (适配 2345, mxyn, ibazi 等)"""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch(url)
+        if response.status_code != 200: return None
         response.encoding = response.apparent_encoding # 自动识别 GBK/UTF-8
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -281,7 +422,8 @@ def extract_generic_chinese(url, keyword):
 def extract_generic_english(url, keyword):
     """通用英文提取器 (适配 DreamMoods, VeryWellMind 等)"""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch(url)
+        if response.status_code != 200: return None
         soup = BeautifulSoup(response.text, 'html.parser')
         
         title = keyword
@@ -319,20 +461,21 @@ def extract_generic_english(url, keyword):
 def main():
     print("=== 开始运行多源解梦爬虫 (按 Ctrl+C 可随时安全暂停) ===")
     print("支持源: DreamInterpreter, 2345, DreamMoods, VeryWellMind 等 12 个网站")
+    started = time.time()
+    load_source_stats()
     
     # 1. 读取历史记录
     existing_data = []
     if os.path.exists(OUTPUT_FILE):
         try:
-            with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
+            existing_data = load_entries(OUTPUT_FILE)
         except: existing_data = []
     
     # 建立去重集合 (同时检查中文名和英文名/ID)
     existing_keys = set()
     for s in existing_data:
-        existing_keys.add(s['zh']['name'])
-        if 'id' in s: existing_keys.add(s['id'])
+        existing_keys.add(s.zh.name)
+        if s.id: existing_keys.add(s.id)
 
     print(f"检测到已有数据: {len(existing_data)} 条 (将自动跳过)")
     
@@ -355,7 +498,6 @@ def main():
             unique_tasks_map[t['keyword']] = t
     
     unique_tasks = list(unique_tasks_map.values())
-    random.shuffle(unique_tasks) # 打乱顺序，避免对同一个网站请求过于集中
     
     print(f"共发现 {len(unique_tasks)} 个新词条待处理。")
     
@@ -364,7 +506,12 @@ def main():
     
     # --- 核心：安全循环 ---
     try:
-        for item in unique_tasks:
+        # 各网站按自己的速率交替请求，产出率高的网站优先 (见 schedule_tasks)
+        for item in schedule_tasks(unique_tasks):
+            if RUN_TIME_BUDGET and time.time() - started > RUN_TIME_BUDGET:
+                print(f"⏱️ 已用完本次运行的时间预算 ({RUN_TIME_BUDGET} 秒)，剩余词条下次继续")
+                break
+
             keyword = item['keyword']
             url = item['url']
             source = item['source']
@@ -409,17 +556,22 @@ def main():
                     zh_data['name'] = keyword # 保持标题
 
             # 只要有一方有数据，就保存
+            throttle = get_throttle(url)
+            throttle.attempts += 1
             if zh_data and zh_data.get('summary'):
+                throttle.successes += 1
                 filename = generate_seo_filename(keyword)
                 safe_id = hashlib.md5(keyword.encode()).hexdigest()[:8]
                 
-                entry = {
-                    "id": f"auto_{safe_id}_{keyword}",
-                    "filename": filename,
-                    "zh": zh_data, 
-                    "en": en_data if en_data else zh_data, # 双重保险
-                    "meta": { "source_url": url, "origin": source }
-                }
+                zh_record = LangRecord.from_dict(zh_data)
+                entry = Entry(
+                    id=f"auto_{safe_id}_{keyword}",
+                    filename=filename,
+                    zh=zh_record,
+                    # 双重保险：没有英文内容时直接共用中文记录，和中文相同的字段也共用同一个对象
+                    en=LangRecord.from_dict(en_data, base=zh_record) if en_data else zh_record,
+                    meta={"source_url": url, "origin": source}
+                )
                 
                 existing_data.append(entry)
                 existing_keys.add(keyword)
@@ -429,26 +581,25 @@ def main():
             else:
                 print(f"  -> 失败: 无法提取内容")
             
-            time.sleep(random.uniform(1.0, 3.0))
-            
             if new_count >= 10:
                 print("--- 自动保存进度 ---")
-                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(existing_data, f, ensure_ascii=False, indent=2)
+                dump_entries(existing_data, OUTPUT_FILE)
+                save_source_stats()
                 new_count = 0
 
     except KeyboardInterrupt:
         print("\n\n>>> 检测到暂停指令 (Ctrl+C) <<<")
         print("正在紧急保存当前数据，请稍候...")
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
+        dump_entries(existing_data, OUTPUT_FILE)
+        save_source_stats()
         print("✅ 数据已安全保存。下次运行将从此处继续。")
         return
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=2)
+    dump_entries(existing_data, OUTPUT_FILE)
+    save_source_stats()
     
-    print(f"\n全部完成！本次新增 {total_new} 条数据。")
+    print(f"\n全部完成！本次新增 {total_new} 条数据，用时 {time.time() - started:.0f} 秒。")
+    print_throttle_summary()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,317 @@
+import os
+import re
+import sys
+import json
+import time
+import posixpath
+import unicodedata
+from urllib.parse import unquote, urlsplit
+from concurrent.futures import ProcessPoolExecutor
+
+import build_site
+import add_ads
+import deploy_manifest
+from entries import STUB_SUMMARIES
+
+# ================= 配置区 =================
+
+# 🩺 站点校验：把输出目录里的每个页面分批交给进程池，每个文件只读取、解析一次，
+# 再把 词条页 / 索引页 / sitemap 三方交叉核对。结果写入 REPORT_FILE，
+# 有 ERROR_CHECKS 里的问题时退出码为 1，部署脚本据此拦截：
+#     python validate_site.py && <部署命令>
+
+REPORT_FILE = 'validate-report.json'   # 放在 public/ 外面，不会被部署
+BATCH_SIZE = 500
+WORKERS = os.cpu_count() or 4
+
+# 这些文字出现在简介里等于没有内容 (爬虫提取失败或没有英文内容时写入的占位)
+PLACEHOLDER_TEXTS = STUB_SUMMARIES
+
+# sitemap / 页面链接里指向输出目录之外的页面 (如 dream-plaza.html)，到仓库根目录里找
+EXTRA_ROOTS = ['.']
+
+# 会让本次校验失败的问题；其余只作为警告写进报告
+ERROR_CHECKS = {
+    'unreadable',            # 不是合法的 UTF-8
+    'placeholder_left',      # 模板占位符没有被替换
+    'no_page_data',          # 找不到或解析不了内嵌的 pageData
+    'empty_name',
+    'empty_summary',
+    'missing_ad',            # 没有广告代码 (立即加载或延迟加载)
+    'duplicate_document',    # 同一个文件里出现了两份 <html>
+    'filename_mismatch',     # pageData 里的文件名和实际文件名不一致
+    'misencoded_filename',
+    'broken_link',           # 页面里的站内链接指向不存在的文件
+    'misplaced_page',        # 分子目录布局下，页面不在它应在的子目录里
+    'missing_rewrite',       # 分子目录布局下，没有改写函数或它和当前布局不一致
+    'index_broken_link',
+    'sitemap_missing_file',
+}
+
+PAGE_DATA = 'const pageData = '
+HREF = re.compile(r'href="([^"]*)"')
+SITEMAP_LOC = re.compile(r'<loc>\s*([^<]+?)\s*</loc>')
+PERCENT_ESCAPE = re.compile(r'%[0-9A-Fa-f]{2}')
+UNFILLED = ('REPLACE_ME_WITH_JSON', '{{ZH_')
+
+# ==========================================
+
+def filename_problem(name):
+    """ 文件名看起来被编码错了时返回原因，否则返回 None """
+    if '\ufffd' in name:
+        return "含有替换字符 U+FFFD"
+    if any('\udc80' <= ch <= '\udcff' for ch in name):
+        return "含有无法按 UTF-8 解码的字节"
+    if PERCENT_ESCAPE.search(name):
+        return "含有 %XX 转义"
+    if not unicodedata.is_normalized('NFC', name):
+        return "不是 NFC 规范化形式"
+    # 把 UTF-8 字节当成 Latin-1 / CP1252 解读出来的乱码 (如 "æ¢¦")
+    if any('\x80' <= ch <= '\xff' for ch in name):
+        for codec in ('latin-1', 'cp1252'):
+            try:
+                fixed = name.encode(codec).decode('utf-8')
+            except UnicodeError:
+                continue
+            if fixed != name:
+                return f"疑似乱码，按 {codec} 还原为 {fixed!r}"
+    return None
+
+def internal_target(href, page_rel):
+    """ 把站内链接解析成相对输出目录的路径；站外链接、锚点、脚本链接返回 None """
+    if href.startswith(build_site.DOMAIN + '/'):
+        href = href[len(build_site.DOMAIN):]
+    elif href.startswith(('http:', 'https:', '#')):
+        return None
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.endswith('/'):
+        path += 'index.html'
+    if path.startswith('/'):
+        return posixpath.normpath(path.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page_rel), path))
+
+def page_record(page_data):
+    """ 取页面自己语言的词条内容 (新页面带 lang 字段，旧页面中英文都内嵌、默认显示中文) """
+    return page_data.get(page_data.get('lang') or 'zh') or {}
+
+def check_page(root, rel, public):
+    """ 检查一个词条页 (rel 为磁盘路径，public 为对外网址路径)，返回 (问题列表 [(检查项, 说明)], 站内链接目标) """
+    problems = []
+    try:
+        with open(os.path.join(root, rel), 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError as e:
+        return [('unreadable', str(e))], []
+
+    for marker in UNFILLED:
+        if marker in content:
+            problems.append(('placeholder_left', marker))
+    documents = content.count('<html')
+    if documents > 1:
+        problems.append(('duplicate_document', f"{documents} 份 <html>"))
+    # 立即加载和延迟加载两种广告代码里都有 adsbygoogle.js 的完整地址
+    if add_ads.AD_SCRIPT_URL not in content:
+        problems.append(('missing_ad', "找不到广告代码"))
+
+    # pageData 是单独一行：const pageData = {...};
+    page_data = None
+    start = content.find(PAGE_DATA)
+    if start != -1:
+        start += len(PAGE_DATA)
+        end = content.find('\n', start)
+        try:
+            page_data = json.loads(content[start:end if end != -1 else None].rstrip().rstrip(';'))
+        except ValueError:
+            pass
+    if not isinstance(page_data, dict):
+        problems.append(('no_page_data', "pageData 缺失或不是合法 JSON"))
+    else:
+        record = page_record(page_data)
+        if not str(record.get('name') or '').strip():
+            problems.append(('empty_name', "name 为空"))
+        if str(record.get('summary') or '').strip() in PLACEHOLDER_TEXTS:
+            problems.append(('empty_summary', f"summary = {record.get('summary')!r}"))
+        expected = page_data.get('filename')
+        if expected and expected != posixpath.basename(rel):
+            problems.append(('filename_mismatch', f"pageData 里是 {expected!r}"))
+
+    links = set()
+    for href in HREF.findall(content):
+        # 相对链接按浏览器看到的网址解析 (分子目录布局下和磁盘路径不同)
+        target = internal_target(href, public)
+        if target:
+            links.add(target)
+    return problems, sorted(links)
+
+def check_batch(args):
+    """ 子进程入口：检查一批页面 """
+    root, paths = args
+    return [(rel,) + check_page(root, rel, public) for rel, public in paths]
+
+class Report:
+    def __init__(self):
+        self.issues = {}
+
+    def add(self, check, path, detail=""):
+        self.issues.setdefault(check, []).append({'path': path, 'detail': detail})
+
+    def counts(self, errors):
+        return {check: len(items) for check, items in sorted(self.issues.items()) if (check in ERROR_CHECKS) == errors}
+
+class Layout:
+    """ 对外网址路径 <-> 磁盘路径 (按 build_site.DREAMS_LAYOUT 分子目录) """
+    def __init__(self, root):
+        self.page_dirs = [os.path.relpath(d, root).replace(os.sep, '/') for d in build_site.LANG_DIRS.values()]
+
+    def page_dir(self, rel):
+        return next((d for d in self.page_dirs if rel.startswith(d + '/')), None)
+
+    def public_path(self, rel):
+        folder = self.page_dir(rel)
+        return posixpath.join(folder, posixpath.basename(rel)) if folder else rel
+
+    def disk_path(self, rel):
+        folder, name = posixpath.split(rel)
+        if folder not in self.page_dirs:
+            return rel
+        return posixpath.join(folder, build_site.shard_of(name), name)
+
+def exists(rel, files, layout):
+    if rel in files or layout.disk_path(rel) in files:
+        return True
+    return any(os.path.isfile(os.path.join(extra, rel)) for extra in EXTRA_ROOTS)
+
+def rewrite_problem(lang):
+    """ 改写函数是否存在、是否和当前布局一致；没问题返回 None """
+    path = build_site.rewrite_function_path(lang)
+    if not os.path.exists(path):
+        return "不存在"
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.read() != build_site.rewrite_function_source():
+            return "与当前布局不一致，请重新构建"
+    return None
+
+def listing_links(path, pattern, rel):
+    """ 读取索引页/sitemap，返回 [(原始链接, 站内路径)]；文件不存在返回 None """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [(href, internal_target(href, rel)) for href in pattern.findall(content)]
+
+def validate(root=None, listing=None):
+    root = root or build_site.OUTPUT_DIR
+    started = time.time()
+    report = Report()
+
+    # listing: 调用方已经扫描好的 scan_tree(root) 结果 (流水线里直接复用它的快照)
+    files = set(deploy_manifest.scan_tree(root) if listing is None else listing)
+    layout = Layout(root)
+    # {对外网址路径: 磁盘路径}
+    pages = {layout.public_path(rel): rel for rel in sorted(files) if rel.endswith('.html') and layout.page_dir(rel)}
+
+    # 1. 文件名 (主进程里做，只看名字不读内容)
+    for rel in sorted(files):
+        problem = filename_problem(rel)
+        if problem:
+            report.add('misencoded_filename', rel, problem)
+
+    # 分子目录布局：页面要在自己的子目录里，且要有改写函数把原网址映射过去
+    if build_site.DREAMS_LAYOUT != 'flat':
+        for public, rel in pages.items():
+            if layout.disk_path(public) != rel:
+                report.add('misplaced_page', rel, f"应在 {layout.disk_path(public)}")
+        for lang in build_site.LANG_DIRS:
+            problem = rewrite_problem(lang)
+            if problem:
+                report.add('missing_rewrite', build_site.rewrite_function_path(lang), problem)
+
+    # 2. 词条页：进程池并行检查，每个文件只读一次
+    links = {}
+    items = sorted((rel, public) for public, rel in pages.items())
+    batches = [(root, items[i:i + BATCH_SIZE]) for i in range(0, len(items), BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        for results in pool.map(check_batch, batches):
+            for rel, problems, targets in results:
+                for check, detail in problems:
+                    report.add(check, rel, detail)
+                links[rel] = targets
+
+    for rel, targets in links.items():
+        for target in targets:
+            if not exists(target, files, layout):
+                report.add('broken_link', rel, target)
+
+    # 3. 索引页：链接都要有文件，词条页 (中文) 都要出现在索引里
+    index_links = listing_links(os.path.join(root, 'index.html'), HREF, 'index.html')
+    if index_links is None:
+        report.add('index_broken_link', 'index.html', "索引页不存在")
+    else:
+        indexed = set()
+        for href, target in index_links:
+            if target is None:
+                continue
+            indexed.add(target)
+            if not exists(target, files, layout):
+                report.add('index_broken_link', 'index.html', href)
+        for public, rel in pages.items():
+            if public.startswith(layout.page_dirs[0] + '/') and public not in indexed:
+                report.add('not_in_index', rel)
+
+    # 4. sitemap：每个 URL 背后都要有文件，每个词条页都要在 sitemap 里
+    sitemap_links = listing_links(os.path.join(root, 'sitemap.xml'), SITEMAP_LOC, 'sitemap.xml')
+    if sitemap_links is None:
+        report.add('sitemap_missing_file', 'sitemap.xml', "sitemap 不存在")
+    else:
+        listed = set()
+        for loc, target in sitemap_links:
+            if target is None or not loc.startswith(build_site.DOMAIN + '/'):
+                report.add('sitemap_foreign_url', 'sitemap.xml', loc)
+                continue
+            if target in listed:
+                report.add('sitemap_duplicate', 'sitemap.xml', loc)
+            listed.add(target)
+            if not exists(target, files, layout):
+                report.add('sitemap_missing_file', 'sitemap.xml', loc)
+        for public, rel in pages.items():
+            if public not in listed:
+                report.add('not_in_sitemap', rel)
+
+    errors = report.counts(errors=True)
+    result = {
+        'ok': not errors,
+        'root': root,
+        'files': len(files),
+        'pages': len(pages),
+        'elapsed': round(time.time() - started, 2),
+        'errors': errors,
+        'warnings': report.counts(errors=False),
+        'issues': report.issues,
+    }
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+def main():
+    print("=== 校验生成的站点 ===")
+    if not os.path.isdir(build_site.OUTPUT_DIR):
+        print(f"❌ 找不到输出目录 {build_site.OUTPUT_DIR}")
+        sys.exit(1)
+
+    result = validate()
+    print(f"🔍 检查了 {result['pages']} 个词条页 / {result['files']} 个文件，用时 {result['elapsed']}s")
+    for kind, icon in (('errors', '❌'), ('warnings', '⚠️')):
+        for check, count in result[kind].items():
+            sample = result['issues'][check][0]
+            print(f"   {icon} {check}: {count} (例: {sample['path']} {sample['detail']})")
+    print(f"📝 报告已写入 {REPORT_FILE}")
+
+    if not result['ok']:
+        sys.exit(1)
+    print("✅ 校验通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import os
+import re
+import sys
+import json
+import difflib
+import hashlib
+import argparse
+import tempfile
+import importlib
+import inspect
+import subprocess
+import contextlib
+import io
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# ================= 配置区 =================
+
+# 🔬 渲染差异校验：用两个版本的构建代码 (git 版本号或目录) 在内存里渲染整个词库，
+# 归一化后逐页比较，只输出有差异页面的统计和少量 diff 样例。
+# 用来放心地替换 generate_page() / generate_index_page() / generate_sitemap() 的实现：
+#     python verify_render.py                   # HEAD  vs 当前工作区
+#     python verify_render.py --base HEAD~3      # 指定基准版本
+#     python verify_render.py --base HEAD --head /path/to/other/checkout
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = 'symbols_updated.json'
+TEMPLATE_NAME = 'symbol_template.html'
+
+CHUNK_SIZE = 500          # 每个任务渲染多少个词条
+SAMPLE_LIMIT = 5          # 最多展示几个差异样例
+SAMPLE_LINES = 40         # 每个样例最多展示多少行 diff
+WORKERS = max(1, (os.cpu_count() or 2) // 2)   # 两个版本各用一半进程
+
+WHITESPACE = re.compile(r'\s+')
+BETWEEN_TAGS = re.compile(r'>\s+<')
+DATE = re.compile(r'\b\d{4}-\d{2}-\d{2}\b')
+
+# ==========================================
+
+# --- 子进程里的状态 (每个进程只加载一个版本的构建代码) ---
+_builder = None
+_items = None
+_template = None
+_related = None
+_variants = []
+_with_related = False   # render_page 是否接受 related 参数 (旧版本没有相关链接)
+
+def export_revision(rev):
+    """ 把某个 git 版本的构建代码和模板导出到临时目录，返回目录路径 """
+    target = tempfile.mkdtemp(prefix='verify-render-')
+    names = subprocess.run(['git', 'ls-tree', '--name-only', rev], cwd=SCRIPT_DIR,
+                           capture_output=True, text=True, check=True).stdout.split('\n')
+    for name in names:
+        if name.endswith('.py') or name == TEMPLATE_NAME:
+            blob = subprocess.run(['git', 'show', f'{rev}:{name}'], cwd=SCRIPT_DIR,
+                                  capture_output=True, check=True).stdout
+            with open(os.path.join(target, name), 'wb') as f:
+                f.write(blob)
+    return target
+
+def resolve_side(spec):
+    """ 目录直接使用，其余当作 git 版本号导出 """
+    if spec is None:
+        return SCRIPT_DIR
+    if os.path.isdir(spec):
+        return os.path.abspath(spec)
+    return export_revision(spec)
+
+def field(obj, name):
+    """ 兼容新旧两种数据表示 (Entry 对象 / dict) """
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+def entry_key(item):
+    return field(item, 'id') or field(item, 'filename')
+
+def seo_variants(builder):
+    """ 构建代码里所有 SEO 文案变体 (含 {name} 占位符)，长的在前 """
+    variants = []
+    for name in ('SEO_TITLES_ZH', 'INTRO_TEMPLATES_ZH', 'SEO_TITLES_EN', 'INTRO_TEMPLATES_EN'):
+        variants.extend(getattr(builder, name, []))
+    return sorted(set(variants), key=len, reverse=True)
+
+def normalize(html, name=None):
+    """ 归一化：合并空白、抹掉 SEO 文案变体和日期 """
+    if html is None:
+        return None
+    if name:
+        # 按词条名展开成具体文案后直接替换 (页面正文和内嵌 JSON 里的两种写法)
+        for variant in _variants:
+            text = variant.replace('{name}', name)
+            html = html.replace(text, '{{SEO}}').replace(json.dumps(text, ensure_ascii=False)[1:-1], '{{SEO}}')
+    text = BETWEEN_TAGS.sub('><', WHITESPACE.sub(' ', html)).strip()
+    return DATE.sub('{{DATE}}', text)
+
+def init_worker(builder_dir, related_map):
+    """ 进程池初始化：导入指定目录下的 build_site，加载数据和模板 """
+    global _builder, _items, _template, _related, _variants, _with_related
+    sys.path.insert(0, builder_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _builder = importlib.import_module('build_site')
+        template_path = os.path.join(builder_dir, TEMPLATE_NAME)
+        if os.path.exists(template_path):
+            _builder.TEMPLATE_FILE = template_path
+        _template = _builder.load_template()
+        if hasattr(_builder, 'apply_stylesheet'):
+            _template = _builder.apply_stylesheet(_template, _builder.load_stylesheet_href())
+        if hasattr(_builder, 'load_entries'):
+            _items = _builder.load_entries(DATA_FILE)
+        else:
+            with open(DATA_FILE, 'r', encoding='utf-8') as f:
+                _items = json.load(f)
+    by_key = {entry_key(item): item for item in _items}
+    _related = {key: [by_key[k] for k in keys if k in by_key] for key, keys in related_map.items()}
+    _variants = seo_variants(_builder)
+    _with_related = 'related' in inspect.signature(_builder.render_page).parameters
+
+def render_one(item, lang):
+    """ 渲染并归一化一个页面，词条没有该语言时返回 None """
+    filename = field(item, 'filename')
+    record = field(item, lang)
+    if not filename or record is None:
+        return None
+    if hasattr(_builder, 'has_page') and not _builder.has_page(item, lang):
+        return None
+    if _with_related:
+        html = _builder.render_page(item, _template, lang, _related.get(entry_key(item), []))
+    else:
+        html = _builder.render_page(item, _template, lang)
+    return normalize(html, field(record, 'name'))
+
+def page_langs():
+    return list(getattr(_builder, 'LANG_DIRS', {'zh': None}).keys())
+
+def render_hashes(indices):
+    """ 渲染一批词条，只返回 {页面: 归一化内容的哈希}，不把 HTML 传回主进程 """
+    result = {}
+    for i in indices:
+        item = _items[i]
+        for lang in page_langs():
+            html = render_one(item, lang)
+            if html is not None:
+                result[f"{lang}:{field(item, 'filename')}"] = hashlib.sha1(html.encode('utf-8')).hexdigest()
+    return result
+
+def render_texts(pages):
+    """ 重新渲染指定页面 (或索引/sitemap)，返回归一化后的全文，用来做 diff 样例 """
+    wanted = set(pages)
+    result = {}
+    for item in _items:
+        for lang in page_langs():
+            key = f"{lang}:{field(item, 'filename')}"
+            if key in wanted:
+                result[key] = render_one(item, lang)
+    for key in wanted & {'index.html', 'sitemap.xml'}:
+        result[key] = render_listings()[key]
+    return result
+
+def render_listings():
+    """ 在临时目录里跑 generate_index_page / generate_sitemap，读回归一化内容 """
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        _builder.OUTPUT_DIR = tmp
+        _builder.generate_index_page(_items)
+        _builder.generate_sitemap(_items)
+        for name in ('index.html', 'sitemap.xml'):
+            with open(os.path.join(tmp, name), 'r', encoding='utf-8') as f:
+                result[name] = normalize(f.read())
+    return result
+
+def render_listing_hashes(_):
+    return {name: hashlib.sha1(text.encode('utf-8')).hexdigest() for name, text in render_listings().items()}
+
+def probe(_):
+    """ 返回 (词条数, 该版本是否支持单页渲染 render_page) """
+    return len(_items), hasattr(_builder, 'render_page')
+
+def compare(base_dir, head_dir, related_map):
+    # 用 spawn 启动子进程：fork 会继承主进程已导入的模块，两边就不是各自版本的代码了
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(WORKERS, ctx, init_worker, (base_dir, related_map)) as base_pool, \
+         ProcessPoolExecutor(WORKERS, ctx, init_worker, (head_dir, related_map)) as head_pool:
+        count, base_ok = base_pool.submit(probe, None).result()
+        _, head_ok = head_pool.submit(probe, None).result()
+        if not (base_ok and head_ok):
+            raise SystemExit("❌ 构建代码里没有 render_page()，这个版本太旧，无法在内存里渲染")
+        chunks = [range(i, min(i + CHUNK_SIZE, count)) for i in range(0, count, CHUNK_SIZE)]
+
+        # 两个版本同时渲染
+        base_jobs = [base_pool.submit(render_hashes, chunk) for chunk in chunks]
+        head_jobs = [head_pool.submit(render_hashes, chunk) for chunk in chunks]
+        base_jobs.append(base_pool.submit(render_listing_hashes, None))
+        head_jobs.append(head_pool.submit(render_listing_hashes, None))
+        base_hashes, head_hashes = {}, {}
+        for job in base_jobs:
+            base_hashes.update(job.result())
+        for job in head_jobs:
+            head_hashes.update(job.result())
+
+        differing = sorted(k for k in base_hashes.keys() & head_hashes.keys() if base_hashes[k] != head_hashes[k])
+        only_base = sorted(base_hashes.keys() - head_hashes.keys())
+        only_head = sorted(head_hashes.keys() - base_hashes.keys())
+
+        samples = []
+        if differing:
+            picked = differing[:SAMPLE_LIMIT]
+            base_texts = base_pool.submit(render_texts, picked).result()
+            head_texts = head_pool.submit(render_texts, picked).result()
+            for key in picked:
+                diff = difflib.unified_diff(
+                    base_texts[key].replace('><', '>\n<').split('\n'),
+                    head_texts[key].replace('><', '>\n<').split('\n'),
+                    'base/' + key, 'head/' + key, lineterm='', n=1
+                )
+                samples.append({'page': key, 'diff': list(diff)[:SAMPLE_LINES]})
+
+    return {
+        'pages': len(base_hashes.keys() | head_hashes.keys()),
+        'identical': len(base_hashes.keys() & head_hashes.keys()) - len(differing),
+        'differing': differing,
+        'only_base': only_base,
+        'only_head': only_head,
+        'samples': samples,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="比较两个版本构建代码的渲染结果")
+    parser.add_argument('--base', default='HEAD', help="基准版本：git 版本号或代码目录 (默认 HEAD)")
+    parser.add_argument('--head', default=None, help="对比版本：git 版本号或代码目录 (默认当前工作区)")
+    parser.add_argument('--report', default=None, help="把完整结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    print("=== 渲染差异校验 ===")
+    if not os.path.exists(DATA_FILE):
+        print(f"❌ 找不到数据文件 {DATA_FILE}")
+        sys.exit(2)
+
+    base_dir = resolve_side(args.base)
+    head_dir = resolve_side(args.head)
+    print(f"   base: {args.base} ({base_dir})")
+    print(f"   head: {args.head or '工作区'} ({head_dir})")
+
+    # 相关链接用当前代码算一次，两边共用，避免把相关度计算的差异混进来
+    related_map = {}
+    if os.path.exists(os.path.join(SCRIPT_DIR, 'related.py')):
+        from entries import load_entries
+        from related import compute_related
+        related_map = compute_related(load_entries(DATA_FILE))
+
+    try:
+        result = compare(base_dir, head_dir, related_map)
+    finally:
+        for spec, directory in ((args.base, base_dir), (args.head, head_dir)):
+            if spec is not None and not os.path.isdir(spec):
+                shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"\n📊 共 {result['pages']} 个页面：一致 {result['identical']}，"
+          f"不同 {len(result['differing'])}，仅 base 有 {len(result['only_base'])}，仅 head 有 {len(result['only_head'])}")
+    for key in result['only_base'][:SAMPLE_LIMIT]:
+        print(f"   - 仅 base: {key}")
+    for key in result['only_head'][:SAMPLE_LIMIT]:
+        print(f"   + 仅 head: {key}")
+    for sample in result['samples']:
+        print(f"\n--- {sample['page']} ---")
+        print("\n".join(sample['diff']))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 完整结果已写入 {args.report}")
+
+    if result['differing'] or result['only_base'] or result['only_head']:
+        sys.exit(1)
+    print("✅ 两个版本的输出等价")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import build_site
+from build_css import apply_stylesheet, load_stylesheet_href
+from entries import Entry
+from related import compute_related, entry_key
+
+# ================= 配置区 =================
+
+# 👀 监听模式：常驻内存，模板和数据只解析一次，文件一改只重新生成受影响的页面。
+# 同时在本地起一个 HTTP 预览服务，改完刷新浏览器即可看到效果。
+
+POLL_INTERVAL = 0.3   # 检查文件变化的间隔 (秒)
+PREVIEW_HOST = '127.0.0.1'
+PREVIEW_PORT = 8000
+RECENT_LIMIT = 200    # 记住最近访问过的多少个页面 (模板改动后优先重建)
+
+# ==========================================
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """ 预览服务不打印每一条访问日志；分子目录布局时像改写函数一样到子目录里找页面；
+    模板改动后还没轮到重建的页面，在被访问时当场重建 """
+    def __init__(self, *args, watcher=None, **kwargs):
+        self.watcher = watcher
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def translate_path(self, path):
+        local = super().translate_path(path)
+        folder, filename = os.path.split(os.path.relpath(local, self.directory))
+        for lang, directory in build_site.LANG_DIRS.items():
+            if os.path.normpath(folder) == os.path.relpath(directory, build_site.OUTPUT_DIR):
+                if self.watcher is not None:
+                    self.watcher.ensure_fresh(filename)
+                return os.path.abspath(build_site.page_path(lang, filename))
+        return local
+
+def file_version(path):
+    """ 用 (修改时间, 大小) 判断文件是否变化 """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def raw_key(raw):
+    """ 原始 JSON 词条的 key (与 related.entry_key 一致) """
+    return raw.get('id') or raw.get('filename')
+
+def listing_key(item):
+    """ 索引页和 sitemap 关心的字段 """
+    return (item.filename, item.zh.name if item.zh else None, build_site.has_page(item, 'en'))
+
+class SiteWatcher:
+    def __init__(self):
+        self.template = None
+        self.items = {}         # key -> item
+        self.raw = {}           # key -> 原始 JSON dict，直接比较找出改动的词条
+        self.related_map = {}
+        self.linked_from = {}    # key -> 相关链接里列出了它的词条 key
+        self.versions = {}
+        self.by_filename = {}    # 文件名 -> key，预览服务按网址找词条
+        self.recent = OrderedDict()  # 最近访问过的词条 key (最新的在最后)
+        self.stale = {}          # 模板改动后还没重建的词条 key (按重建顺序)
+        self.stale_since = None
+        self.pending = threading.Event()
+        self.lock = threading.RLock()   # 轮询线程、后台重建线程、预览请求线程共用
+
+    # --- 加载 ---
+
+    def load_template(self):
+        template = build_site.load_template()
+        if template:
+            self.template = apply_stylesheet(template, load_stylesheet_href())
+        return template is not None
+
+    def load_data(self):
+        """ 只解析 JSON，返回 {key: 原始 dict}；Entry 对象只给有变化的词条构建 """
+        try:
+            with open(build_site.DATA_FILE, 'r', encoding='utf-8') as f:
+                return {raw_key(raw): raw for raw in json.load(f) if raw_key(raw)}
+        except (OSError, ValueError) as e:
+            # 编辑器保存到一半时可能读到不完整的 JSON，等下一次变化再试
+            print(f"⚠️ 读取数据失败，等待下次保存: {e}")
+            return None
+
+    def related_items(self, item):
+        return [self.items[key] for key in self.related_map.get(entry_key(item), []) if key in self.items]
+
+    # --- 渲染 ---
+
+    def render(self, items):
+        for item in items:
+            build_site.generate_page(item, self.template, {}, self.related_items(item))
+
+    def remove_pages(self, item):
+        for lang in build_site.LANG_DIRS:
+            if item.filename and os.path.exists(build_site.page_path(lang, item.filename)):
+                os.remove(build_site.page_path(lang, item.filename))
+
+    def refresh_listings(self):
+        data = list(self.items.values())
+        build_site.generate_index_page(data)
+        build_site.generate_sitemap(data)
+
+    # --- 事件 ---
+
+    def start(self):
+        build_site.ensure_dir(build_site.OUTPUT_DIR)
+        for directory in build_site.LANG_DIRS.values():
+            build_site.ensure_dir(directory)
+        build_site.relocate_pages()
+        build_site.generate_rewrites()
+        if not self.load_template():
+            return False
+        raw = self.load_data()
+        if raw is None:
+            return False
+
+        self.raw = raw
+        self.items = {key: Entry.from_dict(value) for key, value in raw.items()}
+        self.by_filename = {item.filename: key for key, item in self.items.items() if item.filename}
+        if build_site.RELATED_ENABLED:
+            self.related_map = compute_related(list(self.items.values()))
+            for key, neighbours in self.related_map.items():
+                for other in neighbours:
+                    self.linked_from.setdefault(other, []).append(key)
+        self.versions = {path: file_version(path) for path in (build_site.TEMPLATE_FILE, build_site.DATA_FILE)}
+        print(f"📚 已载入 {len(self.items)} 条数据")
+        threading.Thread(target=self.render_stale, daemon=True).start()
+        return True
+
+    def on_template_changed(self):
+        if not self.load_template():
+            return
+        # 不在这里一次重建全部页面：最近访问过的排在最前，其余交给后台线程，
+        # 预览服务照常响应，被访问到的旧页面当场重建
+        recent = list(reversed(self.recent))
+        self.stale = dict.fromkeys(recent + [key for key in self.items if key not in self.recent])
+        self.stale_since = time.time()
+        self.pending.set()
+        print(f"🎨 模板已更新，{len(self.stale)} 个页面在后台重建 (最近访问的 {len(recent)} 个优先，访问到的页面立即重建)")
+
+    def ensure_fresh(self, filename):
+        """ 预览请求到达时调用：记下访问记录，页面还是旧模板渲染的就当场重建 """
+        with self.lock:
+            key = self.by_filename.get(filename)
+            if key is None:
+                return
+            self.recent[key] = None
+            self.recent.move_to_end(key)
+            while len(self.recent) > RECENT_LIMIT:
+                self.recent.popitem(last=False)
+            if key in self.stale:
+                del self.stale[key]
+                self.render([self.items[key]])
+
+    def render_stale(self):
+        """ 后台线程：逐个重建模板改动后的旧页面，每个页面单独持锁，不挡住预览请求 """
+        while True:
+            self.pending.wait()
+            with self.lock:
+                if not self.stale:
+                    self.pending.clear()
+                    if self.stale_since is not None:
+                        print(f"🎨 后台重建完成 ({time.time() - self.stale_since:.2f}s)")
+                        self.stale_since = None
+                    continue
+                key = next(iter(self.stale))
+                del self.stale[key]
+                if key in self.items:
+                    self.render([self.items[key]])
+
+    def on_data_changed(self):
+        # 从发现文件变化开始计时 (含解析 JSON)，另外报告距文件保存过去了多久
+        started = time.time()
+        raw = self.load_data()
+        if raw is None:
+            return
+
+        changed = [key for key, value in raw.items() if self.raw.get(key) != value]
+        removed = [key for key in self.raw if key not in raw]
+        # 没变化的词条直接沿用已有的 Entry 对象
+        rebuilt = {key: Entry.from_dict(raw[key]) for key in changed}
+        new_items = {key: rebuilt.get(key) or self.items[key] for key in raw}
+
+        # 名字或文件名变了，索引页和 sitemap 也要跟着变；
+        # 相关链接里列出了它的页面也要重建 (链接文字和地址来自这个词条)
+        listings_changed = bool(removed)
+        relinked = set(removed)
+        for key in changed:
+            old, new = self.items.get(key), new_items[key]
+            if old is None or listing_key(old) != listing_key(new):
+                listings_changed = True
+                if old is not None and old.filename != new.filename:
+                    self.remove_pages(old)
+            if old is None or build_site.related_link(old) != build_site.related_link(new):
+                relinked.add(key)
+        for key in removed:
+            self.remove_pages(self.items[key])
+        affected = set(changed)
+        for key in relinked:
+            affected.update(other for other in self.linked_from.get(key, []) if other in new_items)
+
+        self.items = new_items
+        self.raw = raw
+        self.by_filename = {item.filename: key for key, item in new_items.items() if item.filename}
+        self.render(new_items[key] for key in raw if key in affected)
+        if listings_changed:
+            self.refresh_listings()
+        finished = time.time()
+        saved_at = self.versions[build_site.DATA_FILE][0] / 1e9
+        print(f"🔄 数据已更新: {len(changed)} 个词条变化, {len(affected)} 个页面重建, {len(removed)} 个删除 "
+              f"(处理 {finished - started:.2f}s，距保存 {finished - saved_at:.2f}s)")
+
+    def poll(self):
+        for path, handler in ((build_site.TEMPLATE_FILE, self.on_template_changed),
+                              (build_site.DATA_FILE, self.on_data_changed)):
+            version = file_version(path)
+            if version != self.versions.get(path):
+                self.versions[path] = version
+                if version is not None:
+                    with self.lock:
+                        handler()
+
+def serve_preview(watcher=None):
+    handler = partial(QuietHandler, directory=build_site.OUTPUT_DIR, watcher=watcher)
+    server = ThreadingHTTPServer((PREVIEW_HOST, PREVIEW_PORT), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 本地预览: http://{PREVIEW_HOST}:{PREVIEW_PORT}/")
+    return server
+
+def main():
+    print("=== 监听模式启动 (按 Ctrl+C 退出) ===")
+    watcher = SiteWatcher()
+    if not watcher.start():
+        return
+    print("ℹ️ 相关梦境链接沿用启动时的计算结果，完整构建时会刷新")
+
+    server = serve_preview(watcher)
+    print(f"👀 正在监听 {build_site.TEMPLATE_FILE} 和 {build_site.DATA_FILE} ...")
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            watcher.poll()
+    except KeyboardInterrupt:
+        print("\n👋 已退出监听模式")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()